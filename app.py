@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-import json
+import importlib
 import logging
 from datetime import datetime
 from typing import Callable
@@ -10,61 +10,89 @@ from typing import Callable
 import streamlit as st
 
 from models.entities import Transaction
-from pages import advisor_chat, bill_upload, investment_recs, spending_insights
 from modules.analysis import compute_anomaly_report
 from utils import session as session_utils
 from utils.session import (
     get_i18n,
     init_session_state,
+    mark_storage_restored,
+    needs_storage_restore,
     reset_session_state,
     switch_locale,
 )
-from utils.storage import clear_all_storage, load_from_storage
-from utils.ui_components import responsive_width_kwargs
+from utils.serialization import dumps_bytes
+from utils.storage import (
+    clear_all_storage,
+    get_storage_version,
+    load_many_from_storage,
+)
+from utils.ui_components import fragment, responsive_width_kwargs
+from utils.i18n import I18n
 from utils.design_system import inject_global_styles, render_hero_banner, COLORS, FONTS, SPACING, RADIUS
 
 logger = logging.getLogger(__name__)
 
 
+RESTORE_DEFAULTS: dict[str, object] = {
+    "transactions": [],
+    "monthly_budget": 5000.0,
+    "chat_history": [],
+    "analysis_summary": None,
+    "product_recommendations": None,
+}
+
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _load_persisted_state(storage_version: int) -> dict[str, object]:
+    """Read all persisted keys once per storage-file version (shared by sessions).
+
+    Only the current version is ever looked up, so a single entry is kept.
+    """
+    return load_many_from_storage(RESTORE_DEFAULTS)
+
+
 def restore_data_from_storage() -> None:
     """Hydrate Streamlit session state from persisted storage."""
-    if st.session_state.get("data_restored", False):
+    if not needs_storage_restore():
         return
 
     try:
-        transactions_payload = load_from_storage("transactions", []) or []
+        stored = _load_persisted_state(get_storage_version())
+        transactions_payload = stored["transactions"] or []
         if transactions_payload:
-            transactions: list[Transaction] = []
-            for entry in transactions_payload:
-                if isinstance(entry, Transaction):
-                    transactions.append(entry)
-                elif isinstance(entry, dict):
-                    transactions.append(Transaction(**entry))
-            st.session_state["transactions"] = [
-                txn.model_dump(mode="json") for txn in transactions
-            ]
+            # 存储中的条目本就来自model_dump(mode="json")，直接复用，避免重复校验；
+            # 仅对遗留的Transaction实例做一次序列化
+            if all(isinstance(entry, dict) for entry in transactions_payload):
+                transactions = list(transactions_payload)
+            else:
+                transactions = [
+                    entry if isinstance(entry, dict) else entry.model_dump(mode="json")
+                    for entry in transactions_payload
+                    if isinstance(entry, (dict, Transaction))
+                ]
+            st.session_state["transactions"] = transactions
             logger.info("Restored %d transactions from storage", len(transactions))
 
-        budget = load_from_storage("monthly_budget", 5000.0)
+        budget = stored["monthly_budget"]
         if budget is not None:
             st.session_state["monthly_budget"] = float(budget)
 
-        chat_history = load_from_storage("chat_history", []) or []
+        chat_history = stored["chat_history"] or []
         st.session_state["chat_history"] = list(chat_history)
 
-        analysis_summary = load_from_storage("analysis_summary", None)
+        analysis_summary = stored["analysis_summary"]
         if analysis_summary:
             st.session_state["analysis_summary"] = analysis_summary
 
-        product_recommendations = load_from_storage("product_recommendations", None)
+        product_recommendations = stored["product_recommendations"]
         if product_recommendations:
             st.session_state["product_recommendations"] = product_recommendations
 
-        st.session_state["data_restored"] = True
+        mark_storage_restored()
         logger.info("Data restoration completed")
     except Exception as exc:  # pragma: no cover - defensive
         logger.error("Failed to restore data from storage: %s", exc)
-        st.session_state["data_restored"] = True
+        mark_storage_restored()
 
 
 restore_data_from_storage()
@@ -84,6 +112,27 @@ st.set_page_config(
 inject_global_styles()
 
 
+LOCALE_LABELS: dict[str, str] = {"zh_CN": "中文", "en_US": "English"}
+LOCALE_OPTIONS: tuple[str, ...] = tuple(LOCALE_LABELS.values())
+LOCALE_BY_LABEL: dict[str, str] = {label: key for key, label in LOCALE_LABELS.items()}
+
+
+@st.cache_resource
+def _nav_step_templates(locale: str) -> tuple[tuple[str, str, str, str], ...]:
+    """Return (page_key, badge, nav_label, next_hint) for the 4 workflow steps."""
+    is_zh = locale == "zh_CN"
+    return (
+        ("bill_upload", "1️⃣", "账单上传" if is_zh else "Upload",
+         "👉 上传账单" if is_zh else "👉 Upload bills"),
+        ("spending_insights", "2️⃣", "消费分析" if is_zh else "Analysis",
+         "👉 查看分析" if is_zh else "👉 View insights"),
+        ("advisor_chat", "3️⃣", "AI顾问" if is_zh else "AI Chat",
+         "👉 AI咨询" if is_zh else "👉 Chat with AI"),
+        ("investment_recs", "4️⃣", "投资建议" if is_zh else "Invest",
+         "👉 投资建议" if is_zh else "👉 Invest advice"),
+    )
+
+
 @st.cache_data
 def get_comparison_table(locale: str):
     """Cache comparison table data to avoid recreation on each render."""
@@ -115,9 +164,12 @@ def get_comparison_table(locale: str):
     return pd.DataFrame(comparison_data)
 
 
+@fragment
 def _render_home() -> None:
     """Render the landing page with value proposition and card-based navigation."""
     i18n = get_i18n()
+    # 异常状态只在首页展示，其他页面无需刷新
+    _refresh_anomaly_state(i18n)
     is_zh = i18n.locale == "zh_CN"
 
     # Modern Finance Luxury hero banner with glassmorphism
@@ -212,21 +264,24 @@ def _render_home() -> None:
 
     # Anomaly warnings (prioritized above metrics)
     active_anomalies = session_utils.get_active_anomalies()
-    anomaly_message = st.session_state.get("anomaly_message", "")
+    state = session_utils.snapshot_state("anomaly_message", "chat_history")
+    anomaly_message = state["anomaly_message"] or ""
 
     if active_anomalies:
         st.error(i18n.t("app.anomaly_warning"))
+        active_by_id = {item.get("transaction_id"): item for item in active_anomalies}
+        anomaly_fmt = "**" + i18n.template("app.anomaly_info") + "**"
+        unknown_merchant = i18n.t("common.unknown_merchant")
         for anomaly in active_anomalies[:3]:
             date_str = anomaly.get("date", "-")
-            merchant = anomaly.get(
-                "merchant",
-                i18n.t("common.unknown_merchant"),
-            )
+            merchant = anomaly.get("merchant", unknown_merchant)
             amount = anomaly.get("amount", 0.0)
             reason = anomaly.get("reason", "")
             with st.container():
                 st.markdown(
-                    f"**{i18n.t('app.anomaly_info', date=date_str, merchant=merchant, amount=float(amount))}**"
+                    anomaly_fmt.format(
+                        date=date_str, merchant=merchant, amount=float(amount)
+                    )
                 )
                 if reason:
                     st.caption(reason)
@@ -236,23 +291,15 @@ def _render_home() -> None:
 
                 if cols[0].button(i18n.t("common.btn_confirm"), key=confirm_key):
                     session_utils.record_anomaly_feedback(anomaly, "confirmed")
-                    remaining = [
-                        item
-                        for item in session_utils.get_active_anomalies()
-                        if item.get("transaction_id") != anomaly["transaction_id"]
-                    ]
-                    session_utils.update_anomaly_state(active=remaining)
+                    active_by_id.pop(anomaly["transaction_id"], None)
+                    session_utils.update_anomaly_state(active=list(active_by_id.values()))
                     st.toast(i18n.t("common.toast_confirmed"))
                     st.rerun()
 
                 if cols[1].button(i18n.t("common.btn_mark_fraud"), key=fraud_key):
                     session_utils.record_anomaly_feedback(anomaly, "fraud")
-                    remaining = [
-                        item
-                        for item in session_utils.get_active_anomalies()
-                        if item.get("transaction_id") != anomaly["transaction_id"]
-                    ]
-                    session_utils.update_anomaly_state(active=remaining)
+                    active_by_id.pop(anomaly["transaction_id"], None)
+                    session_utils.update_anomaly_state(active=list(active_by_id.values()))
                     st.toast(i18n.t("common.toast_fraud"))
                     st.rerun()
         st.divider()
@@ -262,7 +309,7 @@ def _render_home() -> None:
     # Calculate metrics
     transactions = session_utils.get_transactions()
     monthly_budget = session_utils.get_monthly_budget()
-    chat_history = st.session_state.get("chat_history", [])
+    chat_history = state["chat_history"] or []
 
     total_spent = sum(txn.amount for txn in transactions)
     budget_remaining = monthly_budget - total_spent
@@ -362,8 +409,7 @@ def _render_home() -> None:
     st.markdown("---")
     st.subheader(i18n.t("app.comparison_title"))
 
-    current_locale = st.session_state.get("locale", "zh_CN")
-    comparison_df = get_comparison_table(current_locale)
+    comparison_df = get_comparison_table(i18n.locale)
     st.dataframe(
         comparison_df,
         **responsive_width_kwargs(st.dataframe),
@@ -388,47 +434,133 @@ def _render_home() -> None:
     st.info(i18n.t("app.info_note"))
 
 
-PAGES: dict[str, Callable[[], None]] = {
+# 页面模块按需导入（"module:attr"），首页访问无需加载pandas/plotly等重依赖
+PAGES: dict[str, Callable[[], None] | str] = {
     "home": _render_home,
-    "bill_upload": bill_upload.render,
-    "spending_insights": spending_insights.render,
-    "advisor_chat": advisor_chat.render,
-    "investment_recs": investment_recs.render,
+    "bill_upload": "pages.bill_upload:render",
+    "spending_insights": "pages.spending_insights:render",
+    "advisor_chat": "pages.advisor_chat:render",
+    "investment_recs": "pages.investment_recs:render",
 }
+_RESOLVED_PAGES: dict[str, Callable[[], None]] = {}
+
 
+def _resolve_page(page_key: str) -> Callable[[], None] | None:
+    """Return the render callable for a page, importing its module on first use."""
+    render = _RESOLVED_PAGES.get(page_key)
+    if render is not None:
+        return render
 
-def _refresh_anomaly_state() -> None:
+    target = PAGES.get(page_key)
+    if target is None:
+        return None
+    if isinstance(target, str):
+        module_path, attr = target.split(":", 1)
+        target = getattr(importlib.import_module(module_path), attr)
+    _RESOLVED_PAGES[page_key] = target
+    return target
+
+
+def _refresh_anomaly_state(i18n: I18n) -> None:
     """Recompute anomaly detection results only when transaction data changes."""
-    i18n = get_i18n()
+    # 廉价指纹：交易版本号+条数+白名单+语言，未变化时跳过校验与检测
+    trusted_merchants = session_utils.get_trusted_merchants()
+    fingerprint = (
+        session_utils.get_transactions_version(),
+        session_utils.get_transactions_count(),
+        tuple(trusted_merchants),
+        st.session_state.get("locale", "zh_CN"),
+    )
+    if fingerprint == st.session_state.get("anomaly_fingerprint"):
+        return
+
     transactions = session_utils.get_transactions()
     if not transactions:
         session_utils.update_anomaly_state(
             active=[],
             message=i18n.t("app.no_transaction_data"),
         )
-        return
+    else:
+        report = compute_anomaly_report(
+            transactions,
+            whitelist_merchants=trusted_merchants,
+        )
+        session_utils.sync_anomaly_state(report)
+    st.session_state["anomaly_fingerprint"] = fingerprint
 
-    # Performance optimization: Only recompute if data changed
-    current_hash = hash(tuple((t.id, t.amount, t.date) for t in transactions))
-    last_hash = st.session_state.get("anomaly_last_hash")
 
-    if current_hash == last_hash:
-        # Data unchanged, skip expensive computation
-        return
+@fragment
+def _render_data_controls(current_locale: str) -> None:
+    """Sidebar export/clear controls; clicks rerun only this fragment."""
+    st.markdown("---")
+    col1, col2 = st.columns(2)
 
-    report = compute_anomaly_report(
-        transactions,
-        whitelist_merchants=session_utils.get_trusted_merchants(),
-    )
-    session_utils.sync_anomaly_state(report)
-    st.session_state["anomaly_last_hash"] = current_hash
+    with col1:
+        if st.button(
+            "📥" if current_locale == "en_US" else "📥",
+            help="导出数据" if current_locale == "zh_CN" else "Export",
+            key="export_data_btn",
+            **responsive_width_kwargs(st.button),
+        ):
+            export_data = load_many_from_storage(
+                {
+                    "transactions": [],
+                    "monthly_budget": 5000.0,
+                    "chat_history": [],
+                    "analysis_summary": [],
+                    "product_recommendations": [],
+                }
+            )
+            export_data["export_time"] = datetime.now().isoformat()
+            json_data = dumps_bytes(export_data, indent=True)
+            st.download_button(
+                label="⬇️",
+                data=json_data,
+                file_name=f"wefinance_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                mime="application/json",
+                key="download_json_btn",
+                **responsive_width_kwargs(st.download_button),
+            )
+
+    with col2:
+        if st.button(
+            "🗑️",
+            help="清除数据" if current_locale == "zh_CN" else "Clear",
+            key="clear_data_btn",
+            **responsive_width_kwargs(st.button),
+        ):
+            if st.session_state.get("confirm_clear", False):
+                clear_all_storage()
+                protected_keys = ("selected_page", "locale")
+                preserved = {
+                    key: st.session_state[key]
+                    for key in protected_keys
+                    if key in st.session_state
+                }
+                st.session_state.clear()
+                st.session_state.update(preserved)
+                st.session_state["confirm_clear"] = False
+                mark_storage_restored(False)
+                st.rerun()
+            else:
+                st.session_state["confirm_clear"] = True
+
+    if st.session_state.get("confirm_clear"):
+        st.caption("⚠️ " + ("再次点击确认" if current_locale == "zh_CN" else "Click again"))
 
 
 def main() -> None:
     """Application bootstrap."""
     init_session_state()
-    _refresh_anomaly_state()
     i18n = get_i18n()
+    # 只读快照：本轮重跑中多次读取的键只经过一次session_state代理
+    state = session_utils.snapshot_state(
+        "locale",
+        "selected_page",
+        "chat_history",
+        "analysis_summary",
+        "product_recommendations",
+    )
 
     with st.sidebar:
         # Sidebar header with brand styling
@@ -469,31 +601,29 @@ def main() -> None:
         """, unsafe_allow_html=True)
 
         # 语言切换（紧凑）
-        locale_labels = {"zh_CN": "中文", "en_US": "English"}
-        current_locale = st.session_state.get("locale", "zh_CN")
-        locale_display = locale_labels.get(current_locale, "中文")
+        current_locale = state["locale"] or "zh_CN"
+        locale_display = LOCALE_LABELS.get(current_locale, "中文")
         selected_display = st.selectbox(
             "🌐 Language" if current_locale == "en_US" else "🌐 语言",
-            options=list(locale_labels.values()),
-            index=list(locale_labels.values()).index(locale_display),
-        )
-        selected_locale = next(
-            key for key, value in locale_labels.items() if value == selected_display
+            options=LOCALE_OPTIONS,
+            index=LOCALE_OPTIONS.index(locale_display),
         )
+        selected_locale = LOCALE_BY_LABEL[selected_display]
         if selected_locale != current_locale:
             switch_locale(selected_locale)
             st.rerun()
 
         # ============ 智能导航引导 (紧凑版) ============
         st.markdown("---")
-        transactions = session_utils.get_transactions()
-        has_transactions = len(transactions) > 0
-        has_chat_history = len(st.session_state.get("chat_history", [])) > 0
-        has_analysis = len(st.session_state.get("analysis_summary", [])) > 0
-        has_recommendations = len(st.session_state.get("product_recommendations", [])) > 0
-
-        steps_completed = sum([has_transactions, has_analysis, has_chat_history, has_recommendations])
-        total_steps = 4
+        # 完成状态只计算一次；交易仅需条数，无需逐条校验为模型
+        has_transactions = session_utils.get_transactions_count() > 0
+        has_chat_history = bool(state["chat_history"])
+        has_analysis = bool(state["analysis_summary"])
+        has_recommendations = bool(state["product_recommendations"])
+        done_flags = (has_transactions, has_analysis, has_chat_history, has_recommendations)
+
+        steps_completed = sum(done_flags)
+        total_steps = len(done_flags)
         progress_percentage = steps_completed / total_steps
 
         # 紧凑进度显示
@@ -501,21 +631,14 @@ def main() -> None:
         st.progress(progress_percentage)
 
         # 智能建议下一步（精简）
-        if not has_transactions:
-            next_step = "👉 上传账单" if current_locale == "zh_CN" else "👉 Upload bills"
-            next_page_key = "bill_upload"
-        elif not has_analysis:
-            next_step = "👉 查看分析" if current_locale == "zh_CN" else "👉 View insights"
-            next_page_key = "spending_insights"
-        elif not has_chat_history:
-            next_step = "👉 AI咨询" if current_locale == "zh_CN" else "👉 Chat with AI"
-            next_page_key = "advisor_chat"
-        elif not has_recommendations:
-            next_step = "👉 投资建议" if current_locale == "zh_CN" else "👉 Invest advice"
-            next_page_key = "investment_recs"
-        else:
-            next_step = "✅ 已完成" if current_locale == "zh_CN" else "✅ All done"
-            next_page_key = None
+        step_templates = _nav_step_templates(current_locale)
+        next_step = "✅ 已完成" if current_locale == "zh_CN" else "✅ All done"
+        next_page_key = None
+        for (page_key, _, _, hint), done in zip(step_templates, done_flags):
+            if not done:
+                next_step = hint
+                next_page_key = page_key
+                break
 
         if next_page_key and st.button(
             next_step,
@@ -530,13 +653,12 @@ def main() -> None:
 
         # 精简导航（移除首页，只保留4个核心步骤）
         nav_labels = {
-            "bill_upload": f"{'✅' if has_transactions else '1️⃣'} " + ("账单上传" if current_locale == "zh_CN" else "Upload"),
-            "spending_insights": f"{'✅' if has_analysis else '2️⃣'} " + ("消费分析" if current_locale == "zh_CN" else "Analysis"),
-            "advisor_chat": f"{'✅' if has_chat_history else '3️⃣'} " + ("AI顾问" if current_locale == "zh_CN" else "AI Chat"),
-            "investment_recs": f"{'✅' if has_recommendations else '4️⃣'} " + ("投资建议" if current_locale == "zh_CN" else "Invest"),
+            page_key: f"{'✅' if done else badge} {label}"
+            for (page_key, badge, label, _), done in zip(step_templates, done_flags)
         }
+        nav_by_label = {label: page_key for page_key, label in nav_labels.items()}
         radio_options = list(nav_labels.values())
-        selected_page = st.session_state.get("selected_page", "home")
+        selected_page = state["selected_page"] or "home"
         if selected_page not in nav_labels:
             selected_page = "bill_upload"  # 默认第一步
         default_index = radio_options.index(nav_labels[selected_page])
@@ -546,9 +668,7 @@ def main() -> None:
             index=default_index,
             label_visibility="collapsed",  # 隐藏标签，进一步节省空间
         )
-        selection = next(
-            key for key, value in nav_labels.items() if value == selection_label
-        )
+        selection = nav_by_label[selection_label]
         st.session_state["selected_page"] = selection
 
         # ============ 紧凑Budget设置 ============
@@ -567,66 +687,16 @@ def main() -> None:
             session_utils.set_monthly_budget(new_budget)
 
         # ============ 紧凑数据管理 ============
-        st.markdown("---")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.button(
-                "📥" if current_locale == "en_US" else "📥",
-                help="导出数据" if current_locale == "zh_CN" else "Export",
-                key="export_data_btn",
-                **responsive_width_kwargs(st.button),
-            ):
-                export_data = {
-                    "transactions": load_from_storage("transactions", []),
-                    "monthly_budget": load_from_storage("monthly_budget", 5000.0),
-                    "chat_history": load_from_storage("chat_history", []),
-                    "analysis_summary": load_from_storage("analysis_summary", []),
-                    "product_recommendations": load_from_storage(
-                        "product_recommendations", []
-                    ),
-                    "export_time": datetime.now().isoformat(),
-                }
-                json_data = json.dumps(export_data, ensure_ascii=False, indent=2)
-                st.download_button(
-                    label="⬇️",
-                    data=json_data,
-                    file_name=f"wefinance_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json",
-                    key="download_json_btn",
-                    **responsive_width_kwargs(st.download_button),
-                )
-
-        with col2:
-            if st.button(
-                "🗑️",
-                help="清除数据" if current_locale == "zh_CN" else "Clear",
-                key="clear_data_btn",
-                **responsive_width_kwargs(st.button),
-            ):
-                if st.session_state.get("confirm_clear", False):
-                    clear_all_storage()
-                    protected_keys = {"selected_page", "locale", "data_restored"}
-                    for state_key in list(st.session_state.keys()):
-                        if state_key not in protected_keys:
-                            del st.session_state[state_key]
-                    st.session_state["confirm_clear"] = False
-                    st.session_state["data_restored"] = False
-                    st.rerun()
-                else:
-                    st.session_state["confirm_clear"] = True
-
-        if st.session_state.get("confirm_clear"):
-            st.caption("⚠️ " + ("再次点击确认" if current_locale == "zh_CN" else "Click again"))
+        _render_data_controls(current_locale)
 
-    render = PAGES.get(selection)
+    render = _resolve_page(selection)
     if render is None:
         st.error(i18n.t("errors.page_missing"))
         return
 
     try:
         # Add loading indicator for better UX
-        with st.spinner("🔄 Loading..." if st.session_state.get("locale") == "en_US" else "🔄 加载中..."):
+        with st.spinner("🔄 Loading..." if current_locale == "en_US" else "🔄 加载中..."):
             render()
     except Exception as exc:  # pylint: disable=broad-except
         logger.exception("页面渲染失败：%s", exc)
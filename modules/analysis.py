@@ -328,10 +328,10 @@ def _month_over_month_insight(
     if df.empty:
         return None
 
-    monthly = df.copy()
-    monthly["year_month"] = monthly["date"].dt.to_period("M")
+    # 月份Series直接作为分组键，不复制DataFrame也不新增列
+    year_month = df["date"].dt.to_period("M").rename("year_month")
     month_totals = (
-        monthly.groupby(["year_month", "category"])["amount"].sum().reset_index()
+        df.groupby([year_month, "category"])["amount"].sum().reset_index()
     )
     if month_totals["year_month"].nunique() < 2:
         return None
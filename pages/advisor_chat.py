@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from typing import List
 
 import streamlit as st
@@ -19,9 +20,42 @@ from utils.session import (
 from utils.ui_components import render_financial_health_card, responsive_width_kwargs
 
 
+# 会话内回复缓存上限（LRU淘汰）
+CHAT_CACHE_MAX_ENTRIES = 20
+
+
 def _init_session_defaults() -> None:
     st.session_state.setdefault("chat_history", [])
-    st.session_state.setdefault("chat_cache", {})
+    cache = st.session_state.get("chat_cache")
+    if not isinstance(cache, OrderedDict):
+        st.session_state["chat_cache"] = OrderedDict(cache or {})
+
+
+def _get_chat_manager(
+    locale: str,
+    history: List[dict],
+    transactions: List[Transaction],
+    monthly_budget: float,
+) -> ChatManager:
+    """复用会话内的ChatManager，仅在账本/预算版本或语言变化时同步数据。"""
+    version = st.session_state.get("chat_cache_version", 0)
+    manager = st.session_state.get("chat_manager")
+    if not isinstance(manager, ChatManager) or manager.locale != locale:
+        manager = ChatManager(
+            history=history,
+            transactions=transactions,
+            monthly_budget=monthly_budget,
+            locale=locale,
+        )
+        st.session_state["chat_manager"] = manager
+        st.session_state["chat_manager_version"] = version
+    elif st.session_state.get("chat_manager_version") != version:
+        manager.update_transactions(transactions)
+        manager.set_monthly_budget(monthly_budget)
+        st.session_state["chat_manager_version"] = version
+    # 交给manager一份快照：页面自行维护并持久化history，避免回复被重复追加
+    manager.history = list(history)
+    return manager
 
 
 def render() -> None:
@@ -86,14 +120,9 @@ def render() -> None:
 
 
     locale = st.session_state.get("locale", "zh_CN")
-    chat_manager = ChatManager(
-        history=history,
-        transactions=transactions,
-        monthly_budget=current_budget,
-        locale=locale,
+    chat_manager = _get_chat_manager(
+        locale, history, transactions_list, current_budget
     )
-    chat_manager.update_transactions(transactions)
-    chat_manager.set_monthly_budget(current_budget)
 
     if history:
         for message in history:
@@ -112,12 +141,12 @@ def render() -> None:
     if not user_prompt:
         return
 
+    # 本轮对话原地追加，每条退出路径只持久化一次
     history.append({"role": "user", "content": user_prompt})
-    history = set_chat_history(history)
     with st.chat_message("user"):
         st.write(user_prompt)
 
-    cache: dict = st.session_state["chat_cache"]
+    cache: OrderedDict = st.session_state["chat_cache"]
     cache_key = build_chat_cache_key(
         user_prompt,
         transactions,
@@ -125,9 +154,10 @@ def render() -> None:
         locale,
     )
     if cache_key in cache:
+        cache.move_to_end(cache_key)
         cached_reply = cache[cache_key]
         history.append({"role": "assistant", "content": cached_reply})
-        history = set_chat_history(history)
+        set_chat_history(history)
         with st.chat_message("assistant"):
             st.write(cached_reply)
             st.caption(i18n.t("common.cache_hit"))
@@ -147,9 +177,8 @@ def render() -> None:
 
         # 缓存完整回复
         cache[cache_key] = full_response
-        if len(cache) > 20:
-            first_key = next(iter(cache))
-            cache.pop(first_key, None)
+        while len(cache) > CHAT_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
 
     history.append({"role": "assistant", "content": full_response})
     set_chat_history(history)
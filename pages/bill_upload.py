@@ -2,30 +2,72 @@
 
 from __future__ import annotations
 
-import csv
 import hashlib
 import io
-import json
-from datetime import date
+from concurrent.futures import as_completed
+from datetime import date, datetime
 from pathlib import Path
-from typing import Iterable, List
+from typing import BinaryIO, Dict, Iterable, List
 
 import pandas as pd
 import streamlit as st
 
 from models.entities import OCRParseResult, Transaction
-from modules.analysis import generate_insights
-from services.ocr_service import MAX_FILE_SIZE_BYTES, OCRService
+from services.ocr_service import MAX_FILE_SIZE_BYTES, OCRService, ocr_thread_pool
 from utils.error_handling import UserFacingError
-from utils.session import get_i18n, get_transactions, set_analysis_summary, set_transactions
-from utils.transactions import generate_transaction_id
+from utils.serialization import loads
+from utils.session import (
+    extend_transactions,
+    get_i18n,
+    get_insights_cached,
+    get_transactions,
+    set_analysis_summary,
+    set_transactions,
+)
+from utils.transactions import generate_transaction_id, generate_transaction_ids_batch
 from utils.ui_components import (
     render_financial_health_card,
     responsive_width_kwargs,
 )
 
 STRUCTURED_FILE_EXTENSIONS = {".csv", ".xlsx", ".xls"}
+# File signatures: xlsx is a ZIP container, legacy xls an OLE2 compound file
+XLSX_MAGIC = b"PK\x03\x04"
+XLS_MAGIC = b"\xd0\xcf\x11\xe0"
+# OCR inputs must start with a PNG, JPEG or PDF signature
+OCR_MAGIC_PREFIXES = (b"\x89PNG", b"\xff\xd8\xff", b"%PDF")
+# Anything smaller cannot hold a readable bill image
+OCR_MIN_FILE_BYTES = 64
 MAX_FILE_SIZE_MB = MAX_FILE_SIZE_BYTES // (1024 * 1024)
+# Columns shown in the post-import summary table
+SUMMARY_TABLE_FIELDS = (
+    "id",
+    "date",
+    "merchant",
+    "category",
+    "amount",
+    "currency",
+    "payment_method",
+)
+# Arrow-backed dtypes: Streamlit ships tables to the browser as Arrow anyway
+SUMMARY_TABLE_DTYPES = {
+    "id": "string[pyarrow]",
+    "date": "date32[pyarrow]",
+    "merchant": "string[pyarrow]",
+    "category": "string[pyarrow]",
+    "amount": "double[pyarrow]",
+    "currency": "string[pyarrow]",
+    "payment_method": "string[pyarrow]",
+}
+# Errors raised by malformed manual input (JSON/CSV decode, pydantic validation,
+# wrong item shapes); anything else is a bug and should surface
+MANUAL_PARSE_ERRORS = (ValueError, TypeError, AttributeError, KeyError)
+# Encodings tried for uploaded CSV: UTF-8 (BOM stripped), then GB18030 bank exports
+CSV_ENCODINGS = ("utf-8-sig", "gb18030")
+# Parsed uploads kept per process, keyed by content hash
+PARSE_CACHE_MAX_ENTRIES = 32
+# Pasted CSV above this size goes through pyarrow's multi-threaded reader
+PYARROW_CSV_MIN_CHARS = 64 * 1024
 
 
 def _is_structured_file(filename: str) -> bool:
@@ -35,60 +77,237 @@ def _is_structured_file(filename: str) -> bool:
     return suffix in STRUCTURED_FILE_EXTENSIONS
 
 
-def _parse_excel_file(file_bytes: bytes, i18n=None) -> List[Transaction]:
-    """Parse Excel file (.xlsx/.xls) into Transaction objects with smart column mapping."""
-    i18n = i18n or get_i18n()
+def _is_ocr_candidate(uploaded_file: BinaryIO) -> bool:
+    """Cheap pre-check: non-trivial size and a PNG/JPEG/PDF signature."""
+
+    size = getattr(uploaded_file, "size", None)
+    if size is not None and size < OCR_MIN_FILE_BYTES:
+        return False
+    uploaded_file.seek(0)
+    head = uploaded_file.read(4)
+    uploaded_file.seek(0)
+    return len(head) == 4 and head.startswith(OCR_MAGIC_PREFIXES)
+
+
+def _detect_structured_format(head: bytes) -> str:
+    """Classify a structured upload from its first bytes: "xlsx", "xls" or "csv"."""
+    if head.startswith(XLSX_MAGIC):
+        return "xlsx"
+    if head.startswith(XLS_MAGIC):
+        return "xls"
+    return "csv"
+
+
+def _structured_import_hint(filename: str, error: str) -> str:
+    """Generic import failure message with a short error excerpt."""
+    return (
+        f"文件导入失败。请检查：\n"
+        f"• 文件是否为有效的Excel (.xlsx/.xls) 或CSV格式\n"
+        f"• 文件内容是否包含有效的交易数据\n"
+        f"• 日期、商户、金额等字段是否完整\n"
+        f"当前文件：{filename}\n"
+        f"详细错误：{error[:80]}"
+    )
+
+
+# Column name mapping: Excel column → Transaction field
+COLUMN_MAPPINGS: Dict[str, str] = {
+    # Date fields
+    "date": "date",
+    "posting_date": "date",
+    "transaction_date": "date",
+    "clear_date": "date",
+    "document_create_date": "date",
+    # Merchant fields
+    "merchant": "merchant",
+    "name_customer": "merchant",
+    "customer_name": "merchant",
+    "vendor": "merchant",
+    "supplier": "merchant",
+    # Category field (less common, often needs manual input)
+    "category": "category",
+    "type": "category",
+    "transaction_type": "category",
+    # Amount fields
+    "amount": "amount",
+    "total_open_amount": "amount",
+    "total_amount": "amount",
+    "transaction_amount": "amount",
+    "value": "amount",
+    # Currency fields
+    "currency": "currency",
+    "invoice_currency": "currency",
+    "transaction_currency": "currency",
+}
+# Columns read verbatim when present (not renamed)
+PASSTHROUGH_COLUMNS = {"id", "payment_method"}
+# pandas read_excel engines in preference order; None = pandas default.
+# pandas opens openpyxl workbooks read-only/data-only, skipping styles and formulas.
+XLSX_ENGINES = ("calamine", "openpyxl")
+XLS_ENGINES = ("calamine", None)
+# Canonical column order when turning cleaned frames into transactions
+TRANSACTION_COLUMNS = (
+    "id",
+    "date",
+    "merchant",
+    "category",
+    "amount",
+    "currency",
+    "payment_method",
+)
+# Chunk size for hashing uploads without materialising a second copy
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def _is_wanted_excel_column(column: object) -> bool:
+    """usecols predicate: keep only columns that map to Transaction fields."""
+    name = str(column).strip().lower()
+    return name in COLUMN_MAPPINGS or name in PASSTHROUGH_COLUMNS
+
+
+def _hash_stream(stream: BinaryIO) -> tuple[str, int]:
+    """Hash a binary stream chunk by chunk; returns (sha256 hex, byte size)."""
+    digest = hashlib.sha256()
+    size = 0
+    stream.seek(0)
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+    return digest.hexdigest(), size
+
+
+def _read_excel_frame(source: BinaryIO) -> pd.DataFrame:
+    """Read the relevant Excel columns, preferring the Rust calamine engine."""
+    source.seek(0)
+    # openpyxl只支持xlsx（ZIP容器）；旧版xls交给pandas默认引擎（xlrd）
+    is_xlsx = _detect_structured_format(source.read(8)) == "xlsx"
+    engines = XLSX_ENGINES if is_xlsx else XLS_ENGINES
+    for engine in engines[:-1]:
+        try:
+            source.seek(0)
+            return pd.read_excel(source, engine=engine, usecols=_is_wanted_excel_column)
+        except (ImportError, ValueError):
+            # calamine需要pandas>=2.2及python-calamine，不可用时逐级回退
+            continue
+    source.seek(0)
+    return pd.read_excel(source, engine=engines[-1], usecols=_is_wanted_excel_column)
+
+
+def _format_excel_date(value: object) -> str:
+    """Render a single Excel date cell as text (object-dtype columns only)."""
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d")
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value).strip()
 
-    # Column name mapping: Excel column → Transaction field
-    COLUMN_MAPPINGS = {
-        # Date fields
-        "date": "date",
-        "posting_date": "date",
-        "transaction_date": "date",
-        "clear_date": "date",
-        "document_create_date": "date",
-        # Merchant fields
-        "merchant": "merchant",
-        "name_customer": "merchant",
-        "customer_name": "merchant",
-        "vendor": "merchant",
-        "supplier": "merchant",
-        # Category field (less common, often needs manual input)
-        "category": "category",
-        "type": "category",
-        "transaction_type": "category",
-        # Amount fields
-        "amount": "amount",
-        "total_open_amount": "amount",
-        "total_amount": "amount",
-        "transaction_amount": "amount",
-        "value": "amount",
-        # Currency fields
-        "currency": "currency",
-        "invoice_currency": "currency",
-        "transaction_currency": "currency",
-    }
 
+def _editor_date(value: object) -> object:
+    """Normalise a data_editor date cell: date objects stay typed, others become text."""
+    if isinstance(value, datetime):
+        # DateColumn返回date/Timestamp，保留为date对象以跳过重复校验
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def _iso_date_or_text(value: str) -> object:
+    """Parse a strict YYYY-MM-DD string to a date; leave anything else as text."""
     try:
-        file_hash = hashlib.sha256(file_bytes).hexdigest()
-        # Read Excel file using pandas
-        df = pd.read_excel(io.BytesIO(file_bytes))
+        return date.fromisoformat(value)
+    except ValueError:
+        return value
+
+
+def _text_column(df: pd.DataFrame, column: str, default: str = "") -> pd.Series:
+    """Return a stripped string column; missing cells/columns become ``default``."""
+    if column not in df.columns:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column].astype("string").str.strip().fillna("")
+    return values.mask(values == "", default).astype(object)
+
+
+def _clean_excel_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Coerce renamed Excel columns and drop rows without date/merchant/amount."""
+    # 原始行号（从1开始，包含被跳过的行），保证交易ID与旧逻辑一致
+    sequence = pd.Series(range(1, len(df) + 1), index=df.index)
+
+    # Cheap null/amount mask first so string work only touches candidate rows
+    amounts = pd.to_numeric(df["amount"], errors="coerce")
+    candidate = df["date"].notna() & df["merchant"].notna() & (amounts > 0)
+    df, amounts, sequence = df[candidate], amounts[candidate], sequence[candidate]
+
+    raw_dates = df["date"]
+    if pd.api.types.is_datetime64_any_dtype(raw_dates):
+        # 真正的日期列直接转为date对象，后续可跳过pydantic校验
+        dates = raw_dates.dt.date
+        has_date = pd.Series(True, index=df.index)
+    else:
+        dates = raw_dates.map(_format_excel_date)
+        has_date = dates != ""
+
+    merchants = _text_column(df, "merchant")
+
+    valid = has_date & (merchants != "")
+    clean = pd.DataFrame(
+        {
+            "sequence": sequence,
+            "id": _text_column(df, "id"),
+            "date": dates,
+            "merchant": merchants,
+            "category": _text_column(df, "category", "其他"),
+            "amount": amounts.astype(float),
+            "currency": _text_column(df, "currency", "CNY"),
+            "payment_method": _text_column(df, "payment_method"),
+        }
+    )
+    return clean[valid]
+
+
+def _build_transaction(**fields) -> Transaction:
+    """Create a Transaction from already-cleaned fields.
+
+    Callers pass stripped strings and float amounts, so validation is only
+    needed when the date is still text that pydantic has to parse. Untrusted
+    payloads (pasted JSON, OCR dicts) keep using ``Transaction(**payload)``.
+    """
+    if isinstance(fields.get("date"), date):
+        return Transaction.model_construct(**fields)
+    return Transaction(**fields)
 
-        if df.empty:
-            raise ValueError(i18n.t("bill_upload.manual_error_no_rows"))
 
-        # Map column names (case-insensitive)
-        column_map = {}
-        mapped_targets = set()  # Track which target fields are already mapped
+def _parse_excel_file(
+    source: bytes | BinaryIO, i18n=None, file_hash: str | None = None
+) -> List[Transaction]:
+    """Parse Excel file (.xlsx/.xls) into Transaction objects with smart column mapping.
 
-        for col in df.columns:
-            col_lower = str(col).strip().lower()
-            if col_lower in COLUMN_MAPPINGS:
-                target_field = COLUMN_MAPPINGS[col_lower]
-                # Only map if this target field hasn't been mapped yet
-                if target_field not in mapped_targets:
-                    column_map[col] = target_field
-                    mapped_targets.add(target_field)
+    ``source`` may be raw bytes or a seekable binary stream (e.g. Streamlit's
+    UploadedFile); pass ``file_hash`` when it was already computed while streaming.
+    """
+    i18n = i18n or get_i18n()
+
+    try:
+        if isinstance(source, (bytes, bytearray)):
+            source = io.BytesIO(source)
+        if file_hash is None:
+            file_hash, _ = _hash_stream(source)
+        # Read only mappable columns from the Excel file
+        df = _read_excel_frame(source)
+
+        # Map column names (case-insensitive); first column wins per target field
+        targets = (
+            df.columns.to_series()
+            .astype("string")
+            .str.strip()
+            .str.lower()
+            .map(COLUMN_MAPPINGS)
+        )
+        keep = targets.notna() & ~targets.duplicated()
+        column_map = dict(zip(df.columns[keep.to_numpy()], targets[keep]))
 
         # Check if we have minimum required fields
         mapped_fields = set(column_map.values())
@@ -105,62 +324,44 @@ def _parse_excel_file(file_bytes: bytes, i18n=None) -> List[Transaction]:
                 f"缺少金额列。Excel文件必须包含以下列之一: amount, total_open_amount, total_amount"
             )
 
+        if df.empty:
+            raise ValueError(i18n.t("bill_upload.manual_error_no_rows"))
+
         # Rename columns according to mapping
         df_renamed = df.rename(columns=column_map)
 
-        transactions: List[Transaction] = []
-        for idx, row in enumerate(df_renamed.to_dict("records"), start=1):
-            # Skip rows with empty date
-            if pd.isna(row.get("date")) or not str(row.get("date", "")).strip():
-                continue
-
-            # Parse date field
-            date_val = row.get("date")
-            if isinstance(date_val, pd.Timestamp):
-                date_str = date_val.strftime("%Y-%m-%d")
-            elif hasattr(date_val, "isoformat"):
-                date_str = date_val.isoformat()
-            else:
-                date_str = str(date_val).strip()
-
-            # Skip if merchant is missing
-            merchant = str(row.get("merchant", "")).strip()
-            if not merchant:
-                continue
-
-            # Category is optional, use default if missing
-            category = str(row.get("category", "")).strip() or "其他"
-
-            try:
-                amount = float(row.get("amount", 0))
-            except (TypeError, ValueError):
-                continue
-
-            # Skip zero or negative amounts
-            if amount <= 0:
-                continue
+        clean = _clean_excel_frame(df_renamed)
+        generated_ids = generate_transaction_ids_batch(
+            merchants=clean["merchant"].tolist(),
+            dates=clean["date"].tolist(),
+            amounts=clean["amount"].tolist(),
+            currencies=clean["currency"].tolist(),
+            source_hash=file_hash,
+            sequences=clean["sequence"].tolist(),
+        )
+        # Explicit IDs from the sheet win over generated ones
+        clean = clean.assign(
+            id=clean["id"].where(
+                clean["id"] != "",
+                pd.Series(generated_ids, index=clean.index, dtype=object),
+            )
+        )
 
-            currency = str(row.get("currency", "CNY")).strip() or "CNY"
-            txn_id = generate_transaction_id(
+        build = _build_transaction
+        transactions: List[Transaction] = [
+            build(
+                id=txn_id,
+                date=date_value,
                 merchant=merchant,
-                date_value=date_str,
+                category=category,
                 amount=amount,
                 currency=currency,
-                source_hash=file_hash,
-                sequence=idx,
-            )
-
-            transactions.append(
-                Transaction(
-                    id=row.get("id", "").strip() or txn_id,
-                    date=date_str,
-                    merchant=merchant,
-                    category=category,
-                    amount=amount,
-                    currency=currency,
-                    payment_method=str(row.get("payment_method", "")).strip() or None,
-                )
+                payment_method=method or None,
             )
+            for txn_id, date_value, merchant, category, amount, currency, method in clean[
+                list(TRANSACTION_COLUMNS)
+            ].itertuples(index=False, name=None)
+        ]
 
         if not transactions:
             raise ValueError(
@@ -184,23 +385,20 @@ def _parse_manual_input(raw_text: str, i18n=None) -> List[Transaction]:
 
     # Try JSON list first.
     if raw_text.startswith("["):
-        data = json.loads(raw_text)
+        data = loads(raw_text)
         if not isinstance(data, list):
             raise ValueError(i18n.t("bill_upload.manual_error_json_root"))
 
+        make_id = generate_transaction_id
         transactions: List[Transaction] = []
-        for idx, item in enumerate(data, start=1):
-            payload = dict(item)
-            merchant = str(payload.get("merchant", ""))
-            date_str = payload.get("date", "")
-            amount = float(payload.get("amount", 0))
-            currency = payload.get("currency", "CNY")
+        for idx, payload in enumerate(data, start=1):
+            # loads() 返回全新的字典，可直接补写id而无需复制
             if not payload.get("id"):
-                payload["id"] = generate_transaction_id(
-                    merchant=merchant,
-                    date_value=date_str,
-                    amount=amount,
-                    currency=currency,
+                payload["id"] = make_id(
+                    merchant=str(payload.get("merchant", "")),
+                    date_value=payload.get("date", ""),
+                    amount=float(payload.get("amount", 0)),
+                    currency=payload.get("currency", "CNY"),
                     source_hash="manual-json",
                     sequence=idx,
                 )
@@ -208,41 +406,113 @@ def _parse_manual_input(raw_text: str, i18n=None) -> List[Transaction]:
         return transactions
 
     # Otherwise assume CSV.
-    csv_stream = io.StringIO(raw_text)
-    reader = csv.DictReader(csv_stream)
-    if not reader.fieldnames:
-        raise ValueError(i18n.t("bill_upload.manual_error_csv_header"))
+    if len(raw_text) >= PYARROW_CSV_MIN_CHARS:
+        # pyarrow引擎只接受字节流；结果同样是字符串列，后续清洗逻辑不变
+        return _parse_csv_lines(
+            io.BytesIO(raw_text.encode("utf-8")),
+            i18n,
+            encoding="utf-8",
+            engine="pyarrow",
+        )
+    return _parse_csv_lines(io.StringIO(raw_text), i18n)
 
-    transactions: List[Transaction] = []
-    for row in reader:
-        if not row:
-            continue
-        currency = row.get("currency", "CNY").strip() or "CNY"
-        txn_id = row.get("id", "").strip() or generate_transaction_id(
-            merchant=row.get("merchant", "").strip(),
-            date_value=row.get("date", "").strip(),
-            amount=float(row.get("amount", 0)),
-            currency=currency,
-            source_hash="manual-csv",
-            sequence=idx,
+
+def _parse_csv_lines(
+    lines: Iterable[str] | BinaryIO,
+    i18n,
+    encoding: str | None = None,
+    engine: str = "c",
+) -> List[Transaction]:
+    """Parse CSV (header first) into Transaction objects via pandas.read_csv.
+
+    ``lines`` may be text, or a binary stream decoded by pandas with ``encoding``.
+    ``engine="pyarrow"`` (binary input only) trades startup cost for a
+    multi-threaded read on large inputs; cells are stripped below either way.
+    """
+    read_options = {} if engine == "pyarrow" else {"skipinitialspace": True}
+    try:
+        df = pd.read_csv(
+            lines,
+            dtype=str,
+            keep_default_na=False,
+            encoding=encoding,
+            engine=engine,
+            **read_options,
         )
+    except pd.errors.EmptyDataError as exc:
+        raise ValueError(i18n.t("bill_upload.manual_error_csv_header")) from exc
 
-        transactions.append(
-            Transaction(
-                id=txn_id,
-                date=row.get("date", "").strip(),
-                merchant=row.get("merchant", "").strip(),
-                category=row.get("category", "").strip(),
-                amount=float(row.get("amount", 0)),
-                currency=currency,
-                payment_method=row.get("payment_method") or None,
-            )
+    df.columns = [str(name).strip().lower() for name in df.columns]
+    if not any(df.columns):
+        raise ValueError(i18n.t("bill_upload.manual_error_csv_header"))
+    # 表头大小写不同但同名时保留第一列
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    merchants = _text_column(df, "merchant")
+    dates = _text_column(df, "date")
+    # 非法金额仍抛出ValueError，与逐行float()行为一致
+    amounts = pd.to_numeric(_text_column(df, "amount", "0")).astype(float)
+    currencies = _text_column(df, "currency", "CNY")
+    generated_ids = generate_transaction_ids_batch(
+        merchants=merchants.tolist(),
+        dates=dates.tolist(),
+        amounts=amounts.tolist(),
+        currencies=currencies.tolist(),
+        source_hash="manual-csv",
+        sequences=range(1, len(df) + 1),
+    )
+    ids = _text_column(df, "id")
+    clean = pd.DataFrame(
+        {
+            "id": ids.where(ids != "", pd.Series(generated_ids, index=df.index, dtype=object)),
+            # ISO日期直接转为date对象，其他写法仍交给pydantic解析
+            "date": dates.map(_iso_date_or_text),
+            "merchant": merchants,
+            "category": _text_column(df, "category"),
+            "amount": amounts,
+            "currency": currencies,
+            "payment_method": _text_column(df, "payment_method"),
+        }
+    )
+
+    transactions: List[Transaction] = [
+        _build_transaction(
+            id=txn_id,
+            date=date_str,
+            merchant=merchant,
+            category=category,
+            amount=amount,
+            currency=currency,
+            payment_method=method or None,
         )
+        for txn_id, date_str, merchant, category, amount, currency, method in clean[
+            list(TRANSACTION_COLUMNS)
+        ].itertuples(index=False, name=None)
+    ]
     if not transactions:
         raise ValueError(i18n.t("bill_upload.manual_error_no_rows"))
     return transactions
 
 
+@st.cache_data(show_spinner=False, max_entries=2)
+def _manual_table_seed(today: str) -> pd.DataFrame:
+    """Seed frame for the manual table editor; rebuilt only when the day changes.
+
+    Edits live in the data_editor widget state, so the seed never has to
+    reflect them. Arrow-backed columns match Streamlit's Arrow transport.
+    """
+    return pd.DataFrame(
+        [
+            {
+                "date": date.fromisoformat(today),
+                "merchant": "",
+                "category": "",
+                "amount": 0.0,
+            }
+        ]
+    ).convert_dtypes(dtype_backend="pyarrow")
+
+
 def _render_manual_entry(i18n) -> None:
     """Render manual entry options for users who bypass OCR."""
 
@@ -253,13 +523,14 @@ def _render_manual_entry(i18n) -> None:
         st.session_state["ocr_results"] = []
         st.session_state["uploaded_files_count"] = 0
 
-        insights = generate_insights(transactions)
+        insights = get_insights_cached(transactions)
         insight_payload = [ins.model_dump() for ins in insights]
         set_analysis_summary(insight_payload)
 
         st.success(i18n.t("bill_upload.manual_success", count=len(transactions)))
         st.session_state.setdefault("manual_entries", [])
-        st.session_state["manual_table_entries"] = []
+        # 清空表格编辑器的状态，下次打开时回到种子行，避免重复导入已提交的行
+        st.session_state.pop("manual_table_editor", None)
         st.session_state["show_manual_entry"] = False
         _render_analysis(transactions, insights, [], i18n)
 
@@ -287,7 +558,7 @@ def _render_manual_entry(i18n) -> None:
         ):
             try:
                 transactions = _parse_manual_input(manual_input, i18n)
-            except Exception as exc:  # pylint: disable=broad-except
+            except MANUAL_PARSE_ERRORS as exc:
                 st.error(i18n.t("bill_upload.manual_invalid") + f" ({exc})")
             else:
                 _finalize_manual_transactions(transactions)
@@ -301,9 +572,8 @@ def _render_manual_entry(i18n) -> None:
         )
         if csv_file is not None:
             try:
-                text = csv_file.read().decode("utf-8")
-                transactions = _parse_manual_input(text, i18n)
-            except Exception as exc:  # pylint: disable=broad-except
+                transactions = _parse_csv_cached(_hash_stream(csv_file)[0], csv_file, i18n)
+            except MANUAL_PARSE_ERRORS as exc:
                 st.error(i18n.t("bill_upload.manual_csv_error", error=exc))
             else:
                 _finalize_manual_transactions(transactions)
@@ -311,17 +581,8 @@ def _render_manual_entry(i18n) -> None:
 
     with tab_table:
         st.caption(i18n.t("bill_upload.manual_table_hint"))
-        table_entries = st.session_state.get("manual_table_entries") or [
-            {
-                "date": date.today(),
-                "merchant": "",
-                "category": "",
-                "amount": 0.0,
-            }
-        ]
-
         table_df = st.data_editor(
-            pd.DataFrame(table_entries),
+            _manual_table_seed(date.today().isoformat()),
             **responsive_width_kwargs(st.data_editor),
             hide_index=True,
             num_rows="dynamic",
@@ -343,59 +604,60 @@ def _render_manual_entry(i18n) -> None:
             },
             key="manual_table_editor",
         )
-        current_rows = table_df.to_dict("records")
-        st.session_state["manual_table_entries"] = current_rows
-
         if st.button(
             i18n.t("bill_upload.manual_table_submit"),
             key="manual_table_submit",
         ):
-            transactions: List[Transaction] = []
-            for idx, row in enumerate(current_rows, start=1):
-                date_raw = row.get("date")
-                if not date_raw:
-                    continue
-                if hasattr(date_raw, "isoformat"):
-                    date_val = date_raw.isoformat()
-                else:
-                    date_val = str(date_raw).strip()
-
-                merchant = str(row.get("merchant") or "").strip()
-                category = str(row.get("category") or "").strip()
-                if not (date_val and merchant and category):
-                    continue
-
-                try:
-                    amount = float(row.get("amount") or 0.0)
-                except (TypeError, ValueError):
-                    st.warning(
-                        i18n.t(
-                            "bill_upload.manual_table_invalid_amount",
-                            row=idx,
-                        )
+            # 编辑内容由data_editor的key保存，只在提交时按列整体校验
+            dates = table_df["date"].map(_editor_date, na_action="ignore").fillna("")
+            merchants = _text_column(table_df, "merchant")
+            categories = _text_column(table_df, "category")
+            raw_amounts = table_df["amount"]
+            amounts = pd.to_numeric(raw_amounts, errors="coerce")
+
+            complete = (dates != "") & (merchants != "") & (categories != "")
+            bad_amount = complete & amounts.isna() & raw_amounts.notna()
+            if bad_amount.any():
+                st.warning(
+                    i18n.t(
+                        "bill_upload.manual_table_invalid_amount",
+                        row=int(bad_amount.to_numpy().argmax()) + 1,
                     )
-                    return
+                )
+                return
 
-                txn_id = generate_transaction_id(
+            # 行号包含被跳过的空行，保证交易ID与逐行生成时一致
+            sequences = pd.Series(range(1, len(table_df) + 1), index=table_df.index)
+            dates = dates[complete]
+            merchants = merchants[complete]
+            categories = categories[complete]
+            amounts = amounts[complete].fillna(0.0).astype(float)
+            generated_ids = generate_transaction_ids_batch(
+                merchants=merchants.tolist(),
+                dates=dates.tolist(),
+                amounts=amounts.tolist(),
+                currencies=["CNY"] * len(amounts),
+                source_hash="manual-table",
+                sequences=sequences[complete].tolist(),
+            )
+            transactions: List[Transaction] = [
+                _build_transaction(
+                    id=txn_id,
+                    date=date_val,
                     merchant=merchant,
-                    date_value=date_val,
+                    category=category,
                     amount=amount,
                     currency="CNY",
-                    source_hash="manual-table",
-                    sequence=idx,
+                    payment_method=None,
                 )
-
-                transactions.append(
-                    Transaction(
-                        id=txn_id,
-                        date=date_val,
-                        merchant=merchant,
-                        category=category,
-                        amount=amount,
-                        currency="CNY",
-                        payment_method=None,
-                    )
+                for txn_id, date_val, merchant, category, amount in zip(
+                    generated_ids,
+                    dates.tolist(),
+                    merchants.tolist(),
+                    categories.tolist(),
+                    amounts.tolist(),
                 )
+            ]
 
             if not transactions:
                 st.warning(i18n.t("bill_upload.manual_table_warning"))
@@ -412,10 +674,18 @@ def _render_analysis(
     i18n,
 ) -> None:
     """Display analysis summary, insights, and raw text sections."""
-    table_rows = [txn.model_dump() for txn in transactions]
+    transactions = list(transactions)
+    # Column-wise (one list per field) instead of one tuple/dict per transaction
+    df = pd.DataFrame(
+        {
+            field: [getattr(txn, field) for txn in transactions]
+            for field in SUMMARY_TABLE_FIELDS
+        },
+        columns=SUMMARY_TABLE_FIELDS,
+    )
     st.subheader(i18n.t("bill_upload.summary_header"))
-    if table_rows:
-        df = pd.DataFrame(table_rows)
+    if not df.empty:
+        df = df.astype(SUMMARY_TABLE_DTYPES)
         st.dataframe(df, **responsive_width_kwargs(st.dataframe))
     else:
         st.info(i18n.t("common.no_data"))
@@ -436,6 +706,71 @@ def _render_analysis(
         st.info(i18n.t("bill_upload.no_text"))
 
 
+@st.cache_resource(show_spinner=False)
+def _get_ocr_service() -> OCRService:
+    """Share one OCRService (and its HTTP client) across reruns and sessions."""
+    return OCRService()
+
+
+@st.cache_data(show_spinner=False, max_entries=PARSE_CACHE_MAX_ENTRIES)
+def _parse_excel_cached(file_hash: str, _source: BinaryIO, _i18n) -> List[Transaction]:
+    """Parse an Excel upload once per content hash (``_`` args are not hashed)."""
+    return _parse_excel_file(_source, _i18n, file_hash=file_hash)
+
+
+@st.cache_data(show_spinner=False, max_entries=PARSE_CACHE_MAX_ENTRIES)
+def _parse_csv_cached(file_hash: str, _source: BinaryIO, _i18n) -> List[Transaction]:
+    """Parse a CSV upload once per content hash; pandas decodes the raw bytes."""
+    for encoding in CSV_ENCODINGS[:-1]:
+        _source.seek(0)
+        try:
+            return _parse_csv_lines(_source, _i18n, encoding=encoding)
+        except UnicodeDecodeError:
+            continue
+    _source.seek(0)
+    return _parse_csv_lines(_source, _i18n, encoding=CSV_ENCODINGS[-1])
+
+
+class _UncachedOCRResult(Exception):
+    """Carries an OCR result out of _ocr_cached without letting cache_data store it."""
+
+    def __init__(self, results: List[OCRParseResult]) -> None:
+        super().__init__("OCR produced no transactions")
+        self.results = results
+
+
+@st.cache_data(show_spinner=False, max_entries=PARSE_CACHE_MAX_ENTRIES)
+def _ocr_cached(
+    file_hash: str, filename: str, model_name: str, _ocr_service: OCRService, _uploaded_file
+) -> List[OCRParseResult]:
+    """OCR a file once per (content, name, model).
+
+    Only results with transactions are cached. OCRService reports most
+    failures as an empty result instead of raising, so those (and genuinely
+    empty files) are raised as _UncachedOCRResult and retried on re-upload.
+    """
+    results = _ocr_service.process_files([_uploaded_file])
+    if not any(result.transactions for result in results):
+        raise _UncachedOCRResult(results)
+    return results
+
+
+def _process_ocr_file(
+    ocr_service: OCRService, uploaded_file, file_hash: str
+) -> tuple[list, Exception | None]:
+    """Run OCR for one file in a worker; errors are returned instead of raised."""
+    try:
+        filename = getattr(uploaded_file, "name", "")
+        return (
+            _ocr_cached(file_hash, filename, ocr_service.model_name, ocr_service, uploaded_file),
+            None,
+        )
+    except _UncachedOCRResult as uncached:
+        return uncached.results, None
+    except Exception as exc:  # pylint: disable=broad-except
+        return [], exc
+
+
 def render() -> None:
     """Render the bill upload workflow."""
     i18n = get_i18n()
@@ -457,11 +792,22 @@ def render() -> None:
         st.info(i18n.t("bill_upload.empty"))
         return
 
-    ocr_service = OCRService()
     manual_mode = bool(st.session_state.get("show_manual_entry", False))
-    structured_results: list[OCRParseResult] = []
+    structured_count = 0
     ocr_ready_files: list = []
-    results: list[OCRParseResult | dict] = []
+    transactions: list[Transaction] = []
+    raw_text_buf = io.StringIO()
+    serialized_results: list[dict] = []
+
+    def _collect(filename: str, text: str, items: Iterable[Transaction]) -> None:
+        """Fold one file's outcome straight into the merged lists."""
+        # 交易本身写入transactions，ocr_results只保留展示所需的文件名和原文
+        serialized_results.append({"filename": filename, "text": text})
+        if len(serialized_results) > 1:
+            raw_text_buf.write("\n\n")
+        raw_text_buf.write(text)
+        transactions.extend(items)
+
     total_transactions_detected = 0
 
     for uploaded_file in uploaded_files:
@@ -485,8 +831,9 @@ def render() -> None:
 
         if _is_structured_file(filename):
             try:
-                file_bytes = uploaded_file.read()
-                if len(file_bytes) > MAX_FILE_SIZE_BYTES:
+                file_hash, streamed_size = _hash_stream(uploaded_file)
+                # .size已在上方检查；仅当上传对象未提供size时才依赖流式计数
+                if file_size is None and streamed_size > MAX_FILE_SIZE_BYTES:
                     raise ValueError(
                         i18n.t(
                             "bill_upload.file_too_large",
@@ -495,24 +842,21 @@ def render() -> None:
                         )
                     )
 
-                # Try Excel first (handles misnamed .csv files that are actually Excel)
+                # Route by magic bytes (handles misnamed .csv files that are actually Excel)
                 structured_transactions = None
                 file_text = ""
                 parse_error = None
+                is_excel = _detect_structured_format(uploaded_file.read(8)) != "csv"
+                uploaded_file.seek(0)
 
-                try:
-                    # Try parsing as Excel
-                    structured_transactions = _parse_excel_file(file_bytes, i18n)
-                    file_text = f"Excel file: {filename}"
-                except Exception as excel_exc:
-                    # If Excel parsing fails, try CSV
-                    excel_error = str(excel_exc)
+                if is_excel:
                     try:
-                        csv_text = file_bytes.decode("utf-8")
-                        structured_transactions = _parse_manual_input(csv_text, i18n)
-                        file_text = csv_text
-                    except Exception as csv_exc:
-                        # Both failed, provide user-friendly error message
+                        structured_transactions = _parse_excel_cached(
+                            file_hash, uploaded_file, i18n
+                        )
+                        file_text = f"Excel file: {filename}"
+                    except Exception as excel_exc:
+                        excel_error = str(excel_exc)
                         if "缺少" in excel_error or "missing" in excel_error.lower():
                             parse_error = (
                                 f"Excel文件缺少必需的列。请确保包含：\n"
@@ -530,14 +874,15 @@ def render() -> None:
                                 f"当前文件：{filename}"
                             )
                         else:
-                            parse_error = (
-                                f"文件导入失败。请检查：\n"
-                                f"• 文件是否为有效的Excel (.xlsx/.xls) 或CSV格式\n"
-                                f"• 文件内容是否包含有效的交易数据\n"
-                                f"• 日期、商户、金额等字段是否完整\n"
-                                f"当前文件：{filename}\n"
-                                f"详细错误：{excel_error[:80]}"
-                            )
+                            parse_error = _structured_import_hint(filename, excel_error)
+                else:
+                    try:
+                        structured_transactions = _parse_csv_cached(
+                            file_hash, uploaded_file, i18n
+                        )
+                        file_text = f"CSV file: {filename}"
+                    except Exception as csv_exc:  # pylint: disable=broad-except
+                        parse_error = _structured_import_hint(filename, str(csv_exc))
 
                 if parse_error or not structured_transactions:
                     raise ValueError(
@@ -555,13 +900,8 @@ def render() -> None:
                 manual_mode = True
                 st.session_state["show_manual_entry"] = True
             else:
-                structured_results.append(
-                    OCRParseResult(
-                        filename=filename,
-                        text=file_text,
-                        transactions=structured_transactions,
-                    )
-                )
+                _collect(filename, file_text, structured_transactions)
+                structured_count += 1
                 total_transactions_detected += len(structured_transactions)
                 st.success(
                     i18n.t(
@@ -572,12 +912,15 @@ def render() -> None:
                 )
             continue
 
-        uploaded_file.seek(0)
+        # 空文件或伪装的图片（如改名的HEIC）直接跳过，不进入OCR流程
+        if not _is_ocr_candidate(uploaded_file):
+            st.warning(i18n.t("bill_upload.unsupported_file", filename=filename))
+            manual_mode = True
+            st.session_state["show_manual_entry"] = True
+            continue
         ocr_ready_files.append(uploaded_file)
 
-    results.extend(structured_results)
-
-    if not ocr_ready_files and not structured_results:
+    if not ocr_ready_files and not structured_count:
         st.warning(i18n.t("bill_upload.warning_no_txn"))
         manual_mode = True
         st.session_state["show_manual_entry"] = True
@@ -587,70 +930,86 @@ def render() -> None:
 
     try:
         if ocr_ready_files:
+            # 仅在确有待识别文件时才构建OCR服务
+            ocr_service = _get_ocr_service()
             total_files = len(ocr_ready_files)
             with st.status(
                 i18n.t("bill_upload.processing_status"), expanded=True
             ) as status:
-                for idx, uploaded_file in enumerate(ocr_ready_files, 1):
-                    filename = getattr(
-                        uploaded_file,
-                        "name",
-                        i18n.t("common.unnamed_file"),
-                    )
-                    st.write(
-                        f"📄 "
-                        + i18n.t(
-                            "bill_upload.processing_file",
-                            current=idx,
-                            total=total_files,
-                            filename=filename,
+                ordered_results: list[list[OCRParseResult] | None] = [None] * total_files
+                # Pool size and the global Vision call limit come from the OCR service
+                pool = ocr_thread_pool(total_files)
+                # Loop-invariant templates, formatted per file/preview row below
+                unnamed_file = i18n.t("common.unnamed_file")
+                processing_fmt = "📄 " + i18n.template("bill_upload.processing_file")
+                recognized_fmt = i18n.template("bill_upload.recognized_count")
+                preview_fmt = i18n.template("bill_upload.transaction_preview")
+                and_more_fmt = i18n.template("bill_upload.and_more")
+                try:
+                    futures = {
+                        pool.submit(
+                            _process_ocr_file,
+                            ocr_service,
+                            uploaded_file,
+                            _hash_stream(uploaded_file)[0],
+                        ): idx
+                        for idx, uploaded_file in enumerate(ocr_ready_files)
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        idx = futures[future]
+                        filename = getattr(ocr_ready_files[idx], "name", unnamed_file)
+                        st.write(
+                            processing_fmt.format(
+                                current=done, total=total_files, filename=filename
+                            )
                         )
-                    )
-                    try:
-                        file_results = ocr_service.process_files([uploaded_file])
-                        results.extend(file_results)
-                        if file_results and file_results[0].transactions:
-                            txn_list = file_results[0].transactions
-                            total_transactions_detected += len(txn_list)
-                            st.success(
+                        file_results, error = future.result()
+                        if isinstance(error, UserFacingError):
+                            raise error
+                        if error is not None:
+                            st.error(
                                 i18n.t(
-                                    "bill_upload.recognized_count",
-                                    count=len(txn_list),
+                                    "bill_upload.file_process_error",
+                                    filename=filename,
+                                    error=str(error),
                                 )
                             )
-                            for txn in txn_list[:3]:
-                                st.caption(
-                                    i18n.t(
-                                        "bill_upload.transaction_preview",
-                                        date=txn.date,
-                                        merchant=txn.merchant,
-                                        amount=f"{txn.amount:.2f}",
-                                    )
+                            manual_mode = True
+                            st.session_state["show_manual_entry"] = True
+                            continue
+
+                        ordered_results[idx] = file_results
+                        if file_results and file_results[0].transactions:
+                            txn_list = file_results[0].transactions
+                            total_transactions_detected += len(txn_list)
+                            st.success(recognized_fmt.format(count=len(txn_list)))
+                            # One caption (one websocket delta) per file; "  \n" is a
+                            # markdown line break
+                            preview_lines = [
+                                preview_fmt.format(
+                                    date=txn.date,
+                                    merchant=txn.merchant,
+                                    amount=f"{txn.amount:.2f}",
                                 )
+                                for txn in txn_list[:3]
+                            ]
                             if len(txn_list) > 3:
-                                st.caption(
-                                    i18n.t(
-                                        "bill_upload.and_more",
-                                        count=len(txn_list) - 3,
-                                    )
+                                preview_lines.append(
+                                    and_more_fmt.format(count=len(txn_list) - 3)
                                 )
+                            st.caption("  \n".join(preview_lines))
                         else:
                             st.warning(i18n.t("bill_upload.no_transactions_in_file"))
                             manual_mode = True
                             st.session_state["show_manual_entry"] = True
-                    except UserFacingError:
-                        raise
-                    except Exception as exc:  # pylint: disable=broad-except
-                        st.error(
-                            i18n.t(
-                                "bill_upload.file_process_error",
-                                filename=filename,
-                                error=str(exc),
-                            )
-                        )
-                        manual_mode = True
-                        st.session_state["show_manual_entry"] = True
-                processed_total = len(structured_results) + total_files
+                finally:
+                    pool.shutdown(wait=False, cancel_futures=True)
+
+                # 按上传顺序合并结果，与完成顺序无关
+                for file_results in ordered_results:
+                    for result in file_results or []:
+                        _collect(result.filename, result.text, result.transactions)
+                processed_total = structured_count + total_files
                 status.update(
                     label=i18n.t(
                         "bill_upload.all_files_processed",
@@ -708,39 +1067,18 @@ def render() -> None:
     if total_transactions_detected:
         st.success(i18n.t("bill_upload.ocr_success", count=total_transactions_detected))
 
-    if not results:
+    if not serialized_results:
         st.warning(i18n.t("bill_upload.warning_no_txn"))
         manual_mode = True
         st.session_state["show_manual_entry"] = True
 
-    transactions: list[Transaction] = []
-    raw_texts: list[str] = []
-    serialized_results: list[dict] = []
-
-    for result in results:
-        if isinstance(result, OCRParseResult):
-            serialized_results.append(result.model_dump())
-            raw_texts.append(result.text)
-            transactions.extend(result.transactions)
-        elif isinstance(result, dict):
-            serialized_results.append(result)
-            raw_texts.append(result.get("text", ""))
-            items = result.get("transactions", [])
-            for item in items:
-                if isinstance(item, Transaction):
-                    transactions.append(item)
-                elif isinstance(item, dict):
-                    transactions.append(Transaction(**item))
-
     if transactions:
         # 追加到现有交易列表，而不是覆盖
-        existing_transactions = get_transactions()
-        all_transactions = list(existing_transactions) + list(transactions)
-        set_transactions(all_transactions)
-        st.session_state["ocr_raw_text"] = "\n\n".join(raw_texts)
+        extend_transactions(transactions)
+        st.session_state["ocr_raw_text"] = raw_text_buf.getvalue()
         st.session_state["ocr_results"] = serialized_results
         st.session_state["uploaded_files_count"] = len(serialized_results)
-        insights = generate_insights(transactions)
+        insights = get_insights_cached(transactions)
         insight_payload = [ins.model_dump() for ins in insights]
         set_analysis_summary(insight_payload)
         st.success(i18n.t("bill_upload.success", count=len(transactions)))
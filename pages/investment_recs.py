@@ -2,8 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
+import re
+from datetime import datetime
 from typing import Any, Dict, Iterable, List, Tuple
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import streamlit as st
@@ -11,14 +15,24 @@ import streamlit as st
 from models.entities import Recommendation, Transaction
 from services.recommendation_service import RecommendationService
 from utils import session as session_utils
+from utils.serialization import loads
 from utils.session import get_i18n, get_monthly_budget, set_product_recommendations
+from utils.storage import load_cached_report, save_cached_report
 from utils.ui_components import (
+    fragment,
     render_financial_health_card,
     responsive_width_kwargs,
 )
 
 # 高级问卷选项数量常量，便于统一维护
 QUESTION_OPTION_COUNT = 3
+# 引导文案请求的超时与重试上限（客户端级别）
+GUIDANCE_TIMEOUT_SECONDS = 15
+GUIDANCE_MAX_RETRIES = 2
+# 两段引导文案合计约30字，200 tokens足够
+GUIDANCE_MAX_TOKENS = 200
+# LLM常把JSON包在```json ... ```代码块里，整体匹配后取出正文
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*(.*?)\s*```\s*$", re.S)
 
 
 def _normalize_question_options(raw_options: Iterable[Any]) -> List[Tuple[str, int]]:
@@ -41,16 +55,21 @@ def _normalize_question_options(raw_options: Iterable[Any]) -> List[Tuple[str, i
         if not label:
             continue
 
-        try:
-            score_int = int(score_value)
-        except (TypeError, ValueError):
-            continue
+        # LLM的JSON通常已是整数分值，跳过int()转换与异常处理
+        if type(score_value) is int:
+            score_int = score_value
+        else:
+            try:
+                score_int = int(score_value)
+            except (TypeError, ValueError):
+                continue
 
         normalized.append((str(label), score_int))
+        # 只取前QUESTION_OPTION_COUNT个有效选项，凑齐即停止
+        if len(normalized) == QUESTION_OPTION_COUNT:
+            return normalized
 
-    if len(normalized) < QUESTION_OPTION_COUNT:
-        return []
-    return normalized[:QUESTION_OPTION_COUNT]
+    return []
 
 
 # 简化版风险问题（LLM生成失败时的后备方案）
@@ -76,34 +95,133 @@ FALLBACK_QUESTIONS: List[Dict[str, object]] = [
 ]
 
 
-@st.cache_data(show_spinner=False)
+def _transaction_cache_key(txn: Transaction) -> Tuple[str, object, float, str]:
+    """Cheap cache key for a Transaction; the id already encodes merchant/date/amount."""
+    return (txn.id, txn.date, txn.amount, txn.category)
+
+
+@st.cache_data(
+    show_spinner=False,
+    ttl="1h",
+    max_entries=64,
+    hash_funcs={Transaction: _transaction_cache_key},
+)
 def _generate_cached_recommendation(
-    transactions_dump: Tuple[Tuple[Tuple[str, object], ...], ...],
-    responses_tuple: Tuple[Tuple[str, int], ...],
+    transactions: List[Transaction],
+    responses: Dict[str, int],
     goal: str,
     locale: str,
 ) -> Dict[str, object]:
     """Cacheable wrapper producing recommendation payload."""
     service = RecommendationService()
-    transactions = [Transaction(**dict(entry)) for entry in transactions_dump]
-    responses = dict(responses_tuple)
     result = service.generate(
         transactions=transactions,
         responses=responses,
         investment_goal=goal,
         locale=locale,
     )
+    # 缓存中直接保存Recommendation对象（pickle往返无需重新校验），
+    # 避免每次rerun在_render_results里重复构造模型
     recs = result.get("recommendations", [])
-    serialized = []
+    validated: List[Recommendation] = []
     for rec in recs:
         if isinstance(rec, Recommendation):
-            serialized.append(rec.model_dump())
+            validated.append(rec)
         elif isinstance(rec, dict):
-            serialized.append(rec)
-    result["recommendations"] = serialized
+            validated.append(Recommendation(**rec))
+    result["recommendations"] = validated
     return result
 
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def _prepare_questions(
+    questions: List[Dict[str, object]],
+) -> Tuple[Tuple[str, str, str, Tuple[Tuple[str, int], ...]], ...]:
+    """Normalize questions once into (id, widget key, prompt, options) rows.
+
+    The questionnaire reruns on every radio click while the questions stay
+    the same, so the rerun loop only reads from this structure.
+    """
+    prepared = []
+    for idx, question in enumerate(questions):
+        question_id = str(question.get("id") or f"advanced_{idx}")
+        prompt = (
+            question.get("prompt")
+            or question.get("question")
+            or question.get("title")
+            or f"问题 {idx+1}"
+        )
+        prepared.append(
+            (
+                question_id,
+                f"risk_advanced_{question_id}_{idx}",  # 确保key唯一
+                str(prompt),
+                tuple(_normalize_question_options(question.get("options", []))),
+            )
+        )
+    return tuple(prepared)
+
+
+def _round_metrics(value: Any) -> Any:
+    """Round metric floats to 2 decimals (recursively) so near-identical profiles share a key."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _round_metrics(item)) for key, item in value.items()))
+    return value
+
+
+def _report_cache_key(
+    transactions: List[Transaction],
+    investment_goal: str,
+    risk_profile: str,
+    metrics: Dict[str, Any],
+    locale: str,
+) -> str:
+    """SHA-256 over the report inputs, with metrics rounded to 2 decimals."""
+    payload = (
+        [_transaction_cache_key(txn) for txn in transactions],
+        investment_goal,
+        risk_profile,
+        _round_metrics(metrics),
+        locale,
+    )
+    return hashlib.sha256(repr(payload).encode("utf-8")).hexdigest()
+
+
+def _stream_or_reuse_report(
+    service: RecommendationService,
+    transactions: List[Transaction],
+    responses: Dict[str, int],
+    investment_goal: str,
+    risk_profile: str,
+    metrics: Dict[str, Any],
+    locale: str,
+) -> str:
+    """Return a cached report for these inputs, or stream a new one and cache it."""
+    cache_key = _report_cache_key(
+        transactions, investment_goal, risk_profile, metrics, locale
+    )
+    cached = load_cached_report(cache_key)
+    if cached:
+        return cached
+
+    report = st.write_stream(
+        service.generate_detailed_report_stream(
+            transactions=transactions,
+            responses=responses,
+            investment_goal=investment_goal,
+            risk_profile=risk_profile,
+            metrics=metrics,
+            locale=locale,
+        )
+    )
+    report = (report or "").strip() if isinstance(report, str) else ""
+    if report:
+        save_cached_report(cache_key, report)
+    return report
+
+
 def _collect_risk_answers(
     questions: List[Dict[str, object]],
     guidance_header: str,
@@ -111,43 +229,32 @@ def _collect_risk_answers(
 ) -> Tuple[Dict[str, int], str]:
     """收集风险评估问卷答案（问题由LLM动态生成）"""
     i18n = get_i18n()
+    is_zh = i18n.locale == "zh_CN"
 
     # 显示LLM生成的引导文案
     st.markdown(f"#### {guidance_header}")
 
     answers: Dict[str, int] = {}
-    for idx, question in enumerate(questions):
-        question_id = question.get("id") or f"advanced_{idx}"
-        key = f"risk_advanced_{question_id}_{idx}"  # 确保key唯一
-        prompt = (
-            question.get("prompt")
-            or question.get("question")
-            or question.get("title")
-            or f"问题 {idx+1}"
-        )
-
-        normalized_options = _normalize_question_options(question.get("options", []))
+    for question_id, key, prompt, normalized_options in _prepare_questions(questions):
         if not normalized_options:
             st.warning(
                 f"⚠️ {prompt} 选项加载异常，已为您跳过。"
-                if i18n.locale == "zh_CN"
+                if is_zh
                 else f"⚠️ Options missing for: {prompt}"
             )
             continue
 
-        option_labels = [opt_label for opt_label, _ in normalized_options]
+        # 反向构建，标签重复时保留第一个选项的分值（与原先的顺序查找一致）
+        label_to_score = dict(reversed(normalized_options))
         selected = st.radio(
             prompt,
-            options=option_labels,
+            options=[opt_label for opt_label, _ in normalized_options],
             index=0,
             key=key,
             horizontal=False,
         )
-
-        for opt_label, score in normalized_options:
-            if opt_label == selected:
-                answers[str(question_id)] = score
-                break
+        if selected in label_to_score:
+            answers[question_id] = label_to_score[selected]
 
     # 显示LLM生成的目标引导文案
     st.markdown(f"#### {goal_guidance}")
@@ -159,7 +266,24 @@ def _collect_risk_answers(
     return answers, goal
 
 
-@st.cache_data(show_spinner=False)
+@st.cache_resource(show_spinner=False)
+def _openai_client(api_key: str | None, base_url: str | None):
+    """Share one OpenAI client (and its connection pool) across reruns and sessions.
+
+    Keyed on the credentials so a changed key/endpoint gets a fresh client.
+    The returned client is shared: never mutate it.
+    """
+    from openai import OpenAI
+
+    return OpenAI(
+        api_key=api_key,
+        base_url=base_url,
+        timeout=GUIDANCE_TIMEOUT_SECONDS,
+        max_retries=GUIDANCE_MAX_RETRIES,
+    )
+
+
+@st.cache_data(show_spinner=False, ttl="24h", max_entries=128)
 def _generate_guidance_text(
     locale: str,
     monthly_avg: float,
@@ -168,15 +292,12 @@ def _generate_guidance_text(
 ) -> Tuple[str, str]:
     """生成引导文案（LLM动态生成）"""
     from utils.error_handling import safe_call
-    from openai import OpenAI
     import os
-    import json
 
     @safe_call(timeout=15, fallback=None, error_message="引导文案生成失败")
     def _call_llm():
-        client = OpenAI(
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("OPENAI_BASE_URL"),
+        client = _openai_client(
+            os.getenv("OPENAI_API_KEY"), os.getenv("OPENAI_BASE_URL")
         )
 
         prompt = f"""你是一位专业的理财顾问，正在引导用户进行风险评估和投资规划。
@@ -226,28 +347,26 @@ Return JSON format:
 }}
 """
 
-        response = client.chat.completions.create(
+        # 流式返回：首字节更早到达，避免慢速线路被网关整体超时
+        stream = client.chat.completions.create(
             model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
             temperature=0.7,
             messages=[
                 {"role": "system", "content": "你是专业的理财顾问，擅长用简洁亲切的语言引导用户。"},
                 {"role": "user", "content": prompt},
             ],
-            timeout=15,
+            max_tokens=GUIDANCE_MAX_TOKENS,
+            stream=True,
         )
 
-        content = response.choices[0].message.content or ""
+        content = "".join(
+            chunk.choices[0].delta.content or ""
+            for chunk in stream
+            if chunk.choices
+        )
         # 清理markdown代码块
-        content = content.strip()
-        if content.startswith("```json"):
-            content = content[7:]
-        if content.startswith("```"):
-            content = content[3:]
-        if content.endswith("```"):
-            content = content[:-3]
-        content = content.strip()
-
-        data = json.loads(content)
+        fenced = _CODE_FENCE_RE.match(content)
+        data = loads(fenced.group(1) if fenced else content.strip())
         return data.get("risk_guidance", ""), data.get("goal_guidance", "")
 
     result = _call_llm()
@@ -262,6 +381,39 @@ Return JSON format:
     )
 
 
+def _render_saved_report(locale: str, key_prefix: str) -> None:
+    """Render the stored detailed report with its download button, if any.
+
+    Shared by the quick-mode page and the results fragment; ``key_prefix``
+    keeps the download button's widget key unique per call site.
+    """
+    report_content = st.session_state.get("detailed_financial_report")
+    if not report_content:
+        return
+
+    st.markdown("---")
+    st.markdown("## 📄 详细理财咨询报告" if locale == "zh_CN" else "## 📄 Detailed Financial Report")
+
+    # 提供下载按钮
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.caption(
+            f"基于您的目标：{st.session_state.get('investment_goal', '')} | 风险偏好：{st.session_state.get('risk_profile_key', '')}型"
+        )
+    with col2:
+        st.download_button(
+            label="💾 下载报告" if locale == "zh_CN" else "💾 Download",
+            data=report_content,
+            file_name=f"financial_report_{datetime.now():%Y%m%d_%H%M}.md",
+            mime="text/markdown",
+            key=f"{key_prefix}_download_report",
+            **responsive_width_kwargs(st.download_button),
+        )
+
+    # 渲染Markdown报告
+    st.markdown(report_content)
+
+
 def _render_results(results: Dict[str, object]) -> None:
     i18n = get_i18n()
     recommendations_raw = results.get("recommendations", [])
@@ -298,7 +450,13 @@ def _render_results(results: Dict[str, object]) -> None:
     if breakdown:
         st.subheader(i18n.t("recommendation.category_breakdown_title"))
         df = pd.DataFrame(
-            [{"category": cat, "share": share * 100} for cat, share in breakdown.items()]
+            {
+                "category": list(breakdown),
+                "share": np.fromiter(
+                    breakdown.values(), dtype=np.float64, count=len(breakdown)
+                )
+                * 100.0,
+            }
         )
         fig = px.bar(
             df,
@@ -321,6 +479,12 @@ def _render_results(results: Dict[str, object]) -> None:
         for idx, step in enumerate(rec.rationale_steps, start=1):
             st.write(f"{idx}. {step}")
 
+    _detailed_report_fragment(profile)
+
+
+@fragment
+def _detailed_report_fragment(profile: Dict[str, object]) -> None:
+    """Detailed report button and output; clicks rerun only this fragment."""
     # 详细报告生成部分
     st.markdown("---")
     st.subheader("📊 生成详细理财报告" if st.session_state.get("locale") == "zh_CN" else "📊 Generate Detailed Financial Report")
@@ -343,14 +507,19 @@ def _render_results(results: Dict[str, object]) -> None:
 
         with st.spinner("正在生成详细报告，这可能需要30-60秒..." if st.session_state.get("locale") == "zh_CN" else "Generating detailed report, this may take 30-60 seconds..."):
             service = RecommendationService()
-            detailed_report = service.generate_detailed_report(
-                transactions=transactions,
-                responses=responses,
-                investment_goal=investment_goal,
-                risk_profile=risk_profile_key,
-                metrics=profile,  # type: ignore[arg-type]
-                locale=st.session_state.get("locale", "zh_CN")
-            )
+            # 边生成边显示（命中缓存则直接复用）；完成后清空占位，由下方统一渲染
+            stream_slot = st.empty()
+            with stream_slot.container():
+                detailed_report = _stream_or_reuse_report(
+                    service,
+                    transactions=transactions,
+                    responses=responses,
+                    investment_goal=investment_goal,
+                    risk_profile=risk_profile_key,
+                    metrics=profile,
+                    locale=st.session_state.get("locale", "zh_CN"),
+                )
+            stream_slot.empty()
 
             if detailed_report:
                 st.session_state["detailed_financial_report"] = detailed_report
@@ -359,22 +528,87 @@ def _render_results(results: Dict[str, object]) -> None:
                 st.error("❌ 报告生成失败，请稍后重试。" if st.session_state.get("locale") == "zh_CN" else "❌ Report generation failed, please try again later.")
 
     # 显示已生成的详细报告
-    if "detailed_financial_report" in st.session_state and st.session_state["detailed_financial_report"]:
-        st.markdown("---")
-        st.markdown("## 📄 详细理财咨询报告" if st.session_state.get("locale") == "zh_CN" else "## 📄 Detailed Financial Advisory Report")
+    _render_saved_report(st.session_state.get("locale", "zh_CN"), key_prefix="results")
 
-        # 提供下载按钮
-        report_content = st.session_state["detailed_financial_report"]
-        st.download_button(
-            label="💾 下载报告（Markdown格式）" if st.session_state.get("locale") == "zh_CN" else "💾 Download Report (Markdown)",
-            data=report_content,
-            file_name=f"financial_report_{pd.Timestamp.now().strftime('%Y%m%d')}.md",
-            mime="text/markdown",
-            key="download_report"
+
+@fragment
+def _advanced_mode_fragment(
+    transactions: List[Transaction], budget: float, locale: str
+) -> None:
+    """Advanced questionnaire body; answering questions reruns only this fragment."""
+    i18n = get_i18n()
+    st.caption(
+        "适合需要精细化风险评估的用户，通过多维度问卷深度分析您的风险承受能力。"
+        if locale == "zh_CN"
+        else "For users who need detailed risk assessment through multi-dimensional questionnaire."
+    )
+
+    # 生成个性化问题与引导文案（同一次LLM请求）
+    with st.spinner(i18n.t("common.loading") if locale == "zh_CN" else "Loading..."):
+        service = RecommendationService()
+        bundle = service.generate_questions_with_guidance(
+            transactions=transactions,
+            budget=budget,
+            locale=locale,
+        ) or {}
+    questions = bundle.get("questions")
+    risk_guidance = bundle.get("risk_guidance", "")
+    goal_guidance = bundle.get("goal_guidance", "")
+
+    # 如果LLM生成失败，使用后备问题
+    if not questions:
+        st.info(
+            "使用简化版问卷（智能问题生成暂时不可用）"
+            if locale == "zh_CN"
+            else "Using simplified questionnaire"
+        )
+        questions = FALLBACK_QUESTIONS
+
+    # 合并请求未返回引导文案时，才单独生成（金额取整到百元以提高缓存命中）
+    if not (risk_guidance and goal_guidance):
+        metrics = service.analyze_transactions(transactions)
+        monthly_avg = float(metrics.get("monthly_average", 0.0) or 0.0)
+        investable = float(metrics.get("investable_amount", 0.0) or 0.0)
+        risk_guidance, goal_guidance = _generate_guidance_text(
+            locale=locale,
+            monthly_avg=round(monthly_avg, -2),
+            budget=round(budget, -2),
+            investable=round(investable, -2),
         )
 
-        # 渲染Markdown报告
-        st.markdown(report_content)
+    # 收集用户答案
+    answers, goal = _collect_risk_answers(questions, risk_guidance, goal_guidance)
+
+    st.subheader(i18n.t("recommendation.step3"))
+    if st.button(i18n.t("recommendation.button_generate"), type="secondary", key="advanced_generate"):
+        try:
+            with st.spinner(i18n.t("common.loading_recommendation")):
+                results = _generate_cached_recommendation(
+                    transactions,
+                    answers,
+                    goal,
+                    locale,
+                )
+        except Exception as exc:
+            st.error(f"{i18n.t('errors.structuring_fail')} ({exc})")
+            return
+
+        # 保存数据到session
+        st.session_state["risk_responses"] = answers
+        st.session_state["investment_goal"] = goal
+        risk_level_str = results.get("risk_level", "")
+        if "保守" in risk_level_str or "conservative" in risk_level_str.lower():
+            st.session_state["risk_profile_key"] = "conservative"
+        elif "进取" in risk_level_str or "aggressive" in risk_level_str.lower():
+            st.session_state["risk_profile_key"] = "aggressive"
+        else:
+            st.session_state["risk_profile_key"] = "balanced"
+
+        recommendation_payload = [rec.model_dump() for rec in results["recommendations"]]
+        set_product_recommendations(recommendation_payload)
+        st.session_state["recommendation_explanation"] = results
+        st.rerun()
+
 
 
 def render() -> None:
@@ -463,8 +697,9 @@ def render() -> None:
                 # 先分析财务指标
                 metrics = service.analyze_transactions(transactions)
 
-                # 直接生成详细报告（跳过问卷流程）
-                detailed_report = service.generate_detailed_report(
+                # 直接生成详细报告（跳过问卷流程）；相同输入复用磁盘缓存，否则流式显示
+                detailed_report = _stream_or_reuse_report(
+                    service,
                     transactions=transactions,
                     responses={},  # 无需问卷数据
                     investment_goal=goal_input.strip(),
@@ -485,33 +720,8 @@ def render() -> None:
                 st.error(f"❌ 生成失败：{exc}" if locale == "zh_CN" else f"❌ Generation failed: {exc}")
 
     # 显示已生成的详细报告（仅当尚未有资产配置结果时避免重复展示）
-    if (
-        "detailed_financial_report" in st.session_state
-        and st.session_state["detailed_financial_report"]
-        and not st.session_state.get("recommendation_explanation")
-    ):
-        st.markdown("---")
-        st.markdown("## 📄 详细理财咨询报告" if locale == "zh_CN" else "## 📄 Detailed Financial Report")
-
-        # 提供下载按钮
-        report_content = st.session_state["detailed_financial_report"]
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.caption(
-                f"基于您的目标：{st.session_state.get('investment_goal', '')} | 风险偏好：{st.session_state.get('risk_profile_key', '')}型"
-            )
-        with col2:
-            st.download_button(
-                label="💾 下载报告" if locale == "zh_CN" else "💾 Download",
-                data=report_content,
-                file_name=f"financial_report_{pd.Timestamp.now().strftime('%Y%m%d_%H%M')}.md",
-                mime="text/markdown",
-                key="download_report",
-                **responsive_width_kwargs(st.download_button),
-            )
-
-        # 渲染Markdown报告
-        st.markdown(report_content)
+    if not st.session_state.get("recommendation_explanation"):
+        _render_saved_report(locale, key_prefix="quick")
 
     # 已存在的资产配置结果（来自高级模式）
     persisted_results = st.session_state.get("recommendation_explanation")
@@ -521,80 +731,7 @@ def render() -> None:
 
     # === 高级模式：保留完整问卷流程（折叠） ===
     with st.expander("🔧 高级模式：完整风险评估问卷（可选）", expanded=False):
-        st.caption(
-            "适合需要精细化风险评估的用户，通过多维度问卷深度分析您的风险承受能力。"
-            if locale == "zh_CN"
-            else "For users who need detailed risk assessment through multi-dimensional questionnaire."
-        )
-
-        # 生成个性化问题（LLM动态生成）
-        with st.spinner(i18n.t("common.loading") if locale == "zh_CN" else "Loading..."):
-            service = RecommendationService()
-            questions = service.generate_personalized_questions(
-                transactions=transactions,
-                budget=budget,
-                locale=locale,
-            )
-
-        # 如果LLM生成失败，使用后备问题
-        if not questions:
-            st.info(
-                "使用简化版问卷（智能问题生成暂时不可用）"
-                if locale == "zh_CN"
-                else "Using simplified questionnaire"
-            )
-            questions = FALLBACK_QUESTIONS
-
-        # 计算财务指标用于生成引导文案
-        metrics = service.analyze_transactions(transactions)
-        monthly_avg = float(metrics.get("monthly_average", 0.0) or 0.0)
-        investable = float(metrics.get("investable_amount", 0.0) or 0.0)
-
-        # 生成引导文案
-        risk_guidance, goal_guidance = _generate_guidance_text(
-            locale=locale,
-            monthly_avg=monthly_avg,
-            budget=budget,
-            investable=investable,
-        )
-
-        # 收集用户答案
-        answers, goal = _collect_risk_answers(questions, risk_guidance, goal_guidance)
-        responses_tuple = tuple(sorted(answers.items()))
-        transactions_dump = tuple(
-            tuple(sorted(tx.model_dump().items(), key=lambda item: item[0]))
-            for tx in transactions
-        )
-
-        st.subheader(i18n.t("recommendation.step3"))
-        if st.button(i18n.t("recommendation.button_generate"), type="secondary", key="advanced_generate"):
-            try:
-                with st.spinner(i18n.t("common.loading_recommendation")):
-                    results = _generate_cached_recommendation(
-                        transactions_dump,
-                        responses_tuple,
-                        goal,
-                        locale,
-                    )
-            except Exception as exc:
-                st.error(f"{i18n.t('errors.structuring_fail')} ({exc})")
-                return
-
-            # 保存数据到session
-            st.session_state["risk_responses"] = answers
-            st.session_state["investment_goal"] = goal
-            risk_level_str = results.get("risk_level", "")
-            if "保守" in risk_level_str or "conservative" in risk_level_str.lower():
-                st.session_state["risk_profile_key"] = "conservative"
-            elif "进取" in risk_level_str or "aggressive" in risk_level_str.lower():
-                st.session_state["risk_profile_key"] = "aggressive"
-            else:
-                st.session_state["risk_profile_key"] = "balanced"
-
-            recommendation_payload = [dict(item) for item in results["recommendations"]]
-            set_product_recommendations(recommendation_payload)
-            st.session_state["recommendation_explanation"] = results
-            st.rerun()
+        _advanced_mode_fragment(transactions, budget, locale)
 
 
 if __name__ == "__main__":  # pragma: no cover - streamlit entry point
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from typing import List, Tuple
 
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import streamlit as st
@@ -59,6 +60,7 @@ def _render_active_anomalies(
         st.caption(
             i18n.t("spending.anomaly_threshold", threshold=f"{threshold_used:.1f}")
         )
+    anomaly_fmt = i18n.template("app.anomaly_info")
     for idx, anomaly in enumerate(anomalies):
         date_str = anomaly.get("date") or "-"
         merchant = anomaly.get("merchant", "未知商户")
@@ -68,7 +70,7 @@ def _render_active_anomalies(
 
         box = st.warning if status == "new" else st.info
         with box(
-            f"{i18n.t('app.anomaly_info', date=date_str, merchant=merchant, amount=float(amount))}"
+            anomaly_fmt.format(date=date_str, merchant=merchant, amount=float(amount))
         ):
             if reason:
                 st.caption(reason)
@@ -184,7 +186,12 @@ def render() -> None:
     if totals:
         with st.expander(i18n.t("spending.category_title"), expanded=False):
             pie_df = pd.DataFrame(
-                [{"category": cat, "amount": amt} for cat, amt in totals.items()]
+                {
+                    "category": list(totals),
+                    "amount": np.fromiter(
+                        totals.values(), dtype=np.float64, count=len(totals)
+                    ),
+                }
             )
             fig_pie = px.pie(
                 pie_df,
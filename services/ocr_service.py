@@ -4,6 +4,8 @@ from __future__ import annotations
 
 import io
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, BinaryIO, Iterable, List, Optional
 
@@ -16,11 +18,20 @@ try:  # pragma: no cover - 外部依赖按需安装
 except ImportError:  # pragma: no cover - 运行时再提示用户安装
     pdfium = None
 
+try:  # pragma: no cover - 内部API，随Streamlit版本变化
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+except ImportError:  # pragma: no cover - 脚本/测试环境没有Streamlit
+    add_script_run_ctx = get_script_run_ctx = None
+
 logger = logging.getLogger(__name__)
 
 MAX_FILE_SIZE_MB = 200
 MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
 PDF_RENDER_SCALE = 2.0
+# 并发调用Vision LLM的最大线程数（多文件/多页PDF，页面层线程池同样适用）
+OCR_MAX_WORKERS = 4
+# 进程内同时进行的Vision请求总数；文件级与页级线程池嵌套时也不会超过上限
+_VISION_CALL_SLOTS = threading.BoundedSemaphore(OCR_MAX_WORKERS)
 
 
 def _t(key: str, fallback: str, **kwargs) -> str:
@@ -37,6 +48,21 @@ def _t(key: str, fallback: str, **kwargs) -> str:
             return fallback
 
 
+def ocr_thread_pool(task_count: int) -> ThreadPoolExecutor:
+    """创建线程池，工作线程继承当前Streamlit会话上下文（用于错误信息翻译）。"""
+
+    ctx = get_script_run_ctx() if get_script_run_ctx else None
+
+    def _attach_ctx() -> None:
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+
+    return ThreadPoolExecutor(
+        max_workers=max(1, min(OCR_MAX_WORKERS, task_count)),
+        initializer=_attach_ctx,
+    )
+
+
 def _looks_like_pdf(filename: str, mime_type: str | None) -> bool:
     """判断文件是否为PDF，避免误把CSV交给OCR。"""
 
@@ -116,6 +142,11 @@ class OCRService:
         self._vision_ocr = VisionOCRService(model="gpt-4o")
         logger.info("OCR服务初始化完成，使用Vision LLM (gpt-4o)")
 
+    @property
+    def model_name(self) -> str:
+        """当前使用的视觉模型名称（用于结果缓存键）。"""
+        return self._vision_ocr.model
+
     def extract_text(self, image_bytes: bytes) -> str:
         """
         运行OCR识别（仅用于兼容性，实际使用Vision LLM直接提取交易）
@@ -177,76 +208,82 @@ class OCRService:
         Returns:
             OCRParseResult列表
         """
-        outcomes: List[OCRParseResult] = []
-        for file_obj in files:
-            filename = getattr(
-                file_obj,
-                "name",
-                _t("common.unnamed_file", "Uploaded file"),
+        files = list(files)
+        if len(files) <= 1:
+            outcomes = [self._process_file(file_obj) for file_obj in files]
+        else:
+            # 多文件并发识别；map保持上传顺序，UserFacingError按序向上抛出
+            with ocr_thread_pool(len(files)) as pool:
+                outcomes = list(pool.map(self._process_file, files))
+        return [outcome for outcome in outcomes if outcome is not None]
+
+    def _extract_transactions(self, image_bytes: bytes) -> List[Transaction]:
+        """调用Vision LLM识别单张图片，受全局并发上限约束。"""
+        with _VISION_CALL_SLOTS:
+            return self._vision_ocr.extract_transactions_from_image(image_bytes)
+
+    def _process_file(self, file_obj: BinaryIO) -> Optional[OCRParseResult]:
+        """识别单个文件；空文件返回None，超限或用户可见错误直接抛出。"""
+        filename = getattr(
+            file_obj,
+            "name",
+            _t("common.unnamed_file", "Uploaded file"),
+        )
+        mime_type = getattr(file_obj, "type", None)
+        file_obj.seek(0)
+        raw_bytes = file_obj.read()
+        if not raw_bytes:
+            logger.warning("文件%s为空，已跳过。", filename)
+            return None
+
+        if len(raw_bytes) > MAX_FILE_SIZE_BYTES:
+            message = _t(
+                "errors.file_too_large",
+                "File {filename} exceeds the {size}MB upload limit.",
+                filename=filename,
+                size=MAX_FILE_SIZE_MB,
             )
-            mime_type = getattr(file_obj, "type", None)
-            file_obj.seek(0)
-            raw_bytes = file_obj.read()
-            if not raw_bytes:
-                logger.warning("文件%s为空，已跳过。", filename)
-                continue
-
-            if len(raw_bytes) > MAX_FILE_SIZE_BYTES:
-                message = _t(
-                    "errors.file_too_large",
-                    "File {filename} exceeds the {size}MB upload limit.",
-                    filename=filename,
-                    size=MAX_FILE_SIZE_MB,
-                )
-                suggestion = _t(
-                    "errors.file_too_large_suggestion",
-                    "Please compress the file or split it before retrying.",
-                )
-                raise UserFacingError(message, suggestion=suggestion)
-
-            try:
-                if _looks_like_pdf(filename, mime_type):
-                    # PDF需要先渲染为图片再识别
-                    page_images = _convert_pdf_to_images(raw_bytes, filename)
-                    transactions: List[Transaction] = []
-                    for page_bytes in page_images:
-                        transactions.extend(
-                            self._vision_ocr.extract_transactions_from_image(
-                                page_bytes
-                            )
-                        )
-                else:
-                    # 使用Vision LLM直接提取交易记录
-                    transactions = self._vision_ocr.extract_transactions_from_image(
-                        raw_bytes
-                    )
-
-                # 生成简单的OCR文本用于显示
-                raw_text = "\n".join(
-                    f"{txn.date} | {txn.merchant} | {txn.category} | ¥{txn.amount}"
-                    for txn in transactions
-                )
+            suggestion = _t(
+                "errors.file_too_large_suggestion",
+                "Please compress the file or split it before retrying.",
+            )
+            raise UserFacingError(message, suggestion=suggestion)
 
-                outcomes.append(
-                    OCRParseResult(
-                        filename=filename, text=raw_text, transactions=transactions
-                    )
-                )
-                logger.info(f"文件 {filename} 识别到 {len(transactions)} 条交易记录")
-
-            except UserFacingError:
-                # 让UI层展示友好错误
-                raise
-            except Exception as exc:  # pylint: disable=broad-except
-                logger.error(f"处理文件 {filename} 失败: {exc}")
-                # 返回空结果而不是抛出异常，让用户可以继续处理其他文件
-                failure_text = _t("errors.ocr_run_fail", "OCR failed.")
-                outcomes.append(
-                    OCRParseResult(
-                        filename=filename,
-                        text=f"{failure_text}: {str(exc)}",
-                        transactions=[],
-                    )
-                )
+        try:
+            if _looks_like_pdf(filename, mime_type):
+                # PDF需要先渲染为图片再识别
+                page_images = _convert_pdf_to_images(raw_bytes, filename)
+                transactions: List[Transaction] = []
+                # 各页独立调用Vision LLM，并发执行；map保持页码顺序并按序抛出异常
+                with ocr_thread_pool(len(page_images)) as pool:
+                    for page_transactions in pool.map(
+                        self._extract_transactions, page_images
+                    ):
+                        transactions.extend(page_transactions)
+            else:
+                # 使用Vision LLM直接提取交易记录
+                transactions = self._extract_transactions(raw_bytes)
+
+            # 生成简单的OCR文本用于显示
+            raw_text = "\n".join(
+                f"{txn.date} | {txn.merchant} | {txn.category} | ¥{txn.amount}"
+                for txn in transactions
+            )
 
-        return outcomes
+            logger.info(f"文件 {filename} 识别到 {len(transactions)} 条交易记录")
+            return OCRParseResult(
+                filename=filename, text=raw_text, transactions=transactions
+            )
+
+        except UserFacingError:
+            # 让UI层展示友好错误
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error(f"处理文件 {filename} 失败: {exc}")
+            # 返回空结果而不是抛出异常，让用户可以继续处理其他文件
+            failure_text = _t("errors.ocr_run_fail", "OCR failed.")
+            return OCRParseResult(
+                filename=filename,
+                text=f"{failure_text}: {str(exc)}",
+                transactions=[],
+            )
@@ -3,12 +3,16 @@
 from __future__ import annotations
 
 import ast
+import hashlib
 import json
 import logging
 import os
 import re
-from typing import Any, Dict, Iterable, List, Tuple
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
 
+import numpy as np
 import pandas as pd
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -16,10 +20,289 @@ from openai import OpenAI
 from models.entities import Recommendation, Transaction
 from utils.error_handling import safe_call
 from utils.i18n import I18n
+from utils.serialization import dumps_bytes, loads
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+# 客户端级别的重试上限；流式详细报告单独禁用重试（见generate_detailed_report_stream）
+LLM_MAX_RETRIES = 2
+# 4000-6000字中文报告约需8000-10000 tokens，留出余量
+REPORT_MAX_TOKENS = 12000
+# 确定性（temperature=0）LLM响应的进程内缓存：sha256(model+messages) -> (写入时间, 内容)
+LLM_CACHE_TTL_SECONDS = 3600
+LLM_CACHE_MAX_ENTRIES = 512
+_LLM_RESPONSE_CACHE: Dict[str, Tuple[float, str]] = {}
+_LLM_CACHE_LOCK = threading.Lock()
+# 进程内所有会话共享的请求速率上限（次/分钟）；0表示不限速，
+# 负数或非整数视为无效，回退到默认值。
+# 429/5xx的指数退避重试由OpenAI客户端自身完成（max_retries）
+DEFAULT_LLM_MAX_REQUESTS_PER_MINUTE = 60
+
+
+def _requests_per_minute_from_env() -> int:
+    """Parse LLM_MAX_REQUESTS_PER_MINUTE; 0 disables, negative/garbage use the default."""
+    raw = os.getenv("LLM_MAX_REQUESTS_PER_MINUTE", "").strip()
+    if not raw:
+        return DEFAULT_LLM_MAX_REQUESTS_PER_MINUTE
+    try:
+        value = int(raw)
+    except ValueError:
+        value = -1
+    if value < 0:
+        logger.warning("LLM_MAX_REQUESTS_PER_MINUTE=%r 无效，使用默认值", raw)
+        return DEFAULT_LLM_MAX_REQUESTS_PER_MINUTE
+    return value
+
+
+LLM_MAX_REQUESTS_PER_MINUTE = _requests_per_minute_from_env()
+
+
+class _RequestRateLimiter:
+    """Thread-safe token bucket: ``rate_per_minute`` requests, bursts up to that.
+
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate_per_minute: int) -> None:
+        self.capacity = float(max(rate_per_minute, 0))
+        self.tokens = self.capacity
+        self.refill_per_second = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until one request slot is available."""
+        if self.capacity <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity,
+                    self.tokens + (now - self.updated) * self.refill_per_second,
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+_LLM_RATE_LIMITER = _RequestRateLimiter(LLM_MAX_REQUESTS_PER_MINUTE)
+
+# 风险评估的固定提示词前缀（角色、规则、输出格式）。保持逐字不变，
+# 便于命中服务端的前缀缓存；用户数据只出现在user消息中
+_RISK_SYSTEM_EN = """You are a professional risk assessment advisor with comprehensive financial analysis. Assess the user's true risk tolerance comprehensively from the questionnaire answers and financial profile in the user message.
+
+Comprehensive Assessment Rules:
+1. Don't rely solely on questionnaire score - real data is more important
+2. If volatility > 30%, actual risk tolerance is lower than questionnaire suggests (income unstable)
+3. If investable < 500元/month, not suitable for aggressive strategy
+4. If monthly spending < 3000元, might be student/low-income, be cautious
+
+Analyze and return JSON:
+{
+  "risk_profile": "conservative/balanced/aggressive",
+  "allocation": {
+    "Bond Funds": 0.5,
+    "Stock Funds": 0.3,
+    "Money Market": 0.2
+  },
+  "reasoning": [
+    "Step 1: Based on XX analysis...",
+    "Step 2: Considering XX factors...",
+    "Step 3: Overall recommendation..."
+  ]
+}
+
+Requirements:
+- allocation must sum to 1.0
+- each asset ratio between 0-1
+- reasoning must show causality
+"""
+
+_RISK_SYSTEM_ZH = """你是专业的风险评估顾问，综合分析用户财务状况。请根据用户消息中的问卷回答和财务画像，综合评估用户的风险承受能力。
+
+综合评估规则:
+1. 不要只看问卷分数，消费数据更重要
+2. 如果消费波动率>30%，实际风险承受能力低于问卷显示（收入不稳定）
+3. 如果可投资金额<500元/月，不适合激进策略
+4. 如果月均消费<3000元，可能是学生/低收入群体，需谨慎
+
+请分析并返回JSON:
+{
+  "risk_profile": "conservative/balanced/aggressive",
+  "allocation": {
+    "债券基金": 0.5,
+    "股票基金": 0.3,
+    "货币基金": 0.2
+  },
+  "reasoning": [
+    "分析步骤1: 基于XX判断...",
+    "分析步骤2: 考虑到XX因素...",
+    "分析步骤3: 综合建议..."
+  ]
+}
+
+要求:
+- allocation总和必须等于1.0
+- 每个资产类别占比0-1之间
+- reasoning必须体现因果关系
+"""
+
+# 个性化问卷的固定提示词前缀
+_QUESTIONS_SYSTEM_EN = """You are a professional financial advisor. Generate 3-5 personalized risk tolerance questions based on the user's real financial data given in the user message.
+
+Question Generation Rules:
+1. If volatility > 30%: Ask about income stability
+2. If investable < 500: Ask about emergency fund
+3. If budget_usage > 80%: Ask about debt situation
+4. If top_category_share > 40%: Ask about category-specific plans
+5. Always include: loss tolerance, investment horizon, volatility attitude
+
+Also write two short guidance lines shown above the questionnaire:
+- risk_guidance (10-15 words): guide the user to understand their risk tolerance
+- goal_guidance (10-15 words): guide the user to clarify their investment goal
+Avoid mechanical phrases like "Step 1", "Step 2".
+
+Return JSON format:
+{
+  "risk_guidance": "Risk assessment guidance text",
+  "goal_guidance": "Investment goal guidance text",
+  "questions": [
+    {
+      "id": "custom_q1",
+      "question": "Your question here",
+      "options": [
+        {"label": "Option 1", "score": 1},
+        {"label": "Option 2", "score": 2},
+        {"label": "Option 3", "score": 3}
+      ]
+    }
+  ]
+}
+
+Requirements:
+- 3-5 questions total
+- Each question must have 3 options with scores 1-3
+- Questions must be specific to user's situation
+- Natural, conversational tone
+"""
+
+_QUESTIONS_SYSTEM_ZH = """你是专业的理财顾问，基于用户消息中的真实财务数据，生成3-5个个性化的风险承受能力评估问题。
+
+问题生成规则：
+1. 如果消费波动率>30%：询问收入稳定性
+2. 如果可投资金额<500元：询问是否有紧急备用金
+3. 如果预算使用率>80%：询问债务情况
+4. 如果某类目占比>40%：询问该类目的特殊计划
+5. 必须包含：亏损承受能力、投资期限、波动态度
+
+另外生成两段显示在问卷上方的引导文案：
+- risk_guidance（10-15字）：引导用户了解自己的风险承受能力
+- goal_guidance（10-15字）：引导用户明确投资目标
+不要使用"步骤1"、"步骤2"这种机械化表述。
+
+返回JSON格式：
+{
+  "risk_guidance": "风险评估引导文案",
+  "goal_guidance": "投资目标引导文案",
+  "questions": [
+    {
+      "id": "custom_q1",
+      "question": "您的问题",
+      "options": [
+        {"label": "选项1", "score": 1},
+        {"label": "选项2", "score": 2},
+        {"label": "选项3", "score": 3}
+      ]
+    }
+  ]
+}
+
+要求：
+- 总共3-5个问题
+- 每个问题必须有3个选项，分数1-3
+- 问题必须贴合用户实际情况
+- 语言自然、口语化
+"""
+
+# 交易数低于此值时analyze_transactions走纯numpy路径，不构建DataFrame
+SMALL_ANALYSIS_THRESHOLD = 500
+
+# 设为1时，JSON修复失败后再尝试ast.literal_eval（兼容Python风格的字典输出）
+LLM_JSON_LITERAL_EVAL = os.getenv("LLM_JSON_LITERAL_EVAL", "0") == "1"
+# JSON mode（response_format=json_object）让模型直接输出纯JSON；
+# 会拒绝该参数的兼容后端可设LLM_JSON_MODE=0不发送（解析始终兼容代码块包装）
+LLM_JSON_MODE = os.getenv("LLM_JSON_MODE", "1") != "0"
+_JSON_MODE_KWARGS: Dict[str, Any] = (
+    {"response_format": {"type": "json_object"}} if LLM_JSON_MODE else {}
+)
+
+# 目标文本解析用的正则，模块加载时编译一次
+_GOAL_AMOUNT_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(万|千|元|块)?")
+_GOAL_HORIZON_RE = re.compile(r"(\d+)\s*(年|个月|月)")
+
+
+def _drop_trailing_comma(out: List[str]) -> None:
+    """Remove a ``,`` that is followed only by whitespace at the end of ``out``."""
+    idx = len(out) - 1
+    while idx >= 0 and out[idx].isspace():
+        idx -= 1
+    if idx >= 0 and out[idx] == ",":
+        del out[idx]
+
+
+def _repair_json(text: str) -> str:
+    """Single-pass repair of common LLM JSON slips.
+
+    Starts at the first ``{`` (or ``[`` when there is no object), stops right
+    after the matching close, drops trailing commas before ``}``/``]`` and
+    closes strings/brackets left open by a truncated reply.
+    """
+    start = text.find("{")
+    if start < 0:
+        start = text.find("[")
+    if start < 0:
+        return text
+
+    out: List[str] = []
+    closers: List[str] = []
+    in_string = escaped = False
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            closers.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if closers:
+                closers.pop()
+            out.append(ch)
+            if not closers:
+                return "".join(out)
+            continue
+        out.append(ch)
+
+    # 输出被截断：补全未闭合的字符串和括号
+    if in_string:
+        out.append('"')
+    _drop_trailing_comma(out)
+    out.extend(reversed(closers))
+    return "".join(out)
+
 
 class RecommendationService:
     """Generate risk-aware allocation plans with explainable rationale."""
@@ -48,9 +331,68 @@ class RecommendationService:
         if self._client is None:
             if not self.api_key:
                 raise RuntimeError("OPENAI_API_KEY not configured")
-            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+            self._client = OpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=LLM_MAX_RETRIES,
+            )
         return self._client
 
+    @staticmethod
+    def _llm_cache_key(model: str, messages: List[Dict[str, str]]) -> str:
+        """SHA-256 over the model and every message, \x1f-separated."""
+        parts = [model]
+        for message in messages:
+            parts.append(message["role"])
+            parts.append(message["content"])
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def _chat_content(
+        self,
+        client: OpenAI,
+        messages: List[Dict[str, str]],
+        *,
+        temperature: float,
+        model: str | None = None,
+        cache: bool | None = None,
+        **create_kwargs: Any,
+    ) -> str | None:
+        """Run a chat completion and return its text, reusing identical prompts.
+
+        ``cache`` defaults to on only for ``temperature == 0``; sampled calls
+        opt in explicitly. Empty responses are never cached.
+        """
+        model = model or self.model
+        if cache is None:
+            cache = temperature == 0
+        key = self._llm_cache_key(model, messages) if cache else ""
+
+        if cache:
+            with _LLM_CACHE_LOCK:
+                entry = _LLM_RESPONSE_CACHE.get(key)
+            if entry and time.monotonic() - entry[0] < LLM_CACHE_TTL_SECONDS:
+                logger.info("LLM响应命中缓存")
+                return entry[1]
+
+        # 缓存命中不占用配额，只在真正发请求前限速
+        _LLM_RATE_LIMITER.acquire()
+        response = client.chat.completions.create(
+            model=model,
+            temperature=temperature,
+            messages=messages,
+            **create_kwargs,
+        )
+        content = response.choices[0].message.content
+
+        if cache and content:
+            with _LLM_CACHE_LOCK:
+                _LLM_RESPONSE_CACHE.pop(key, None)
+                _LLM_RESPONSE_CACHE[key] = (time.monotonic(), content)
+                # dict保持插入顺序，超出上限时淘汰最早写入的条目
+                while len(_LLM_RESPONSE_CACHE) > LLM_CACHE_MAX_ENTRIES:
+                    _LLM_RESPONSE_CACHE.pop(next(iter(_LLM_RESPONSE_CACHE)))
+        return content
+
     @staticmethod
     def _strip_code_fences(content: str) -> str:
         """去除LLM输出中常见的markdown代码块包装"""
@@ -66,32 +408,40 @@ class RecommendationService:
 
     @classmethod
     def _parse_llm_json(cls, content: str) -> Any:
-        """容错解析LLM返回的JSON，兼容额外说明或前后缀"""
+        """解析LLM返回的JSON
+
+        JSON mode下内容本身就是合法JSON，先直接解析；失败时（兼容后端可能
+        忽略response_format）再去除代码块包装并修复尾逗号等常见问题。
+        """
+
+        try:
+            return loads(content)
+        except json.JSONDecodeError:
+            pass
 
         cleaned = cls._strip_code_fences(content)
         if not cleaned:
             raise json.JSONDecodeError("empty response", "", 0)
 
         try:
-            return json.loads(cleaned)
+            return loads(cleaned)
         except json.JSONDecodeError as err:
             last_error = err
 
-        match = re.search(r"\{[\s\S]*\}", cleaned)
-        if match:
-            snippet = match.group(0)
-            try:
-                return json.loads(snippet)
-            except json.JSONDecodeError as snippet_err:
-                last_error = snippet_err
-
         try:
-            parsed = ast.literal_eval(cleaned)
-        except (ValueError, SyntaxError):
-            parsed = None
+            return loads(_repair_json(cleaned))
+        except json.JSONDecodeError as repair_err:
+            last_error = repair_err
+
+        # Python字面量（单引号、True/None）需完整语法分析，仅在显式开启时尝试
+        if LLM_JSON_LITERAL_EVAL:
+            try:
+                parsed = ast.literal_eval(cleaned)
+            except (ValueError, SyntaxError):
+                parsed = None
 
-        if isinstance(parsed, (dict, list)):
-            return parsed
+            if isinstance(parsed, (dict, list)):
+                return parsed
 
         raise last_error
 
@@ -124,101 +474,41 @@ class RecommendationService:
         volatility = float(user_profile.get("volatility", 0))
         investable = float(user_profile.get("investable", 0))
 
+        # 规则与输出格式放在固定的system前缀中，user消息只含本次用户数据
+        responses_json = dumps_bytes(responses, indent=True).decode("utf-8")
         if locale == "en_US":
-            prompt = f"""You are a professional financial advisor. Assess user's true risk tolerance comprehensively.
-
-Risk Questionnaire:
-{json.dumps(responses, ensure_ascii=False, indent=2)}
+            system_prompt = _RISK_SYSTEM_EN
+            prompt = f"""Risk Questionnaire:
+{responses_json}
 Total Score: {score}
 
 User Financial Profile:
 - Monthly spending: ¥{monthly_avg:.2f}
 - Spending volatility: {volatility:.2%} (higher = less stable)
 - Investable amount: ¥{investable:.2f}/month
-
-Comprehensive Assessment Rules:
-1. Don't rely solely on questionnaire score - real data is more important
-2. If volatility > 30%, actual risk tolerance is lower than questionnaire suggests (income unstable)
-3. If investable < 500元/month, not suitable for aggressive strategy
-4. If monthly spending < 3000元, might be student/low-income, be cautious
-
-Analyze and return JSON:
-{{
-  "risk_profile": "conservative/balanced/aggressive",
-  "allocation": {{
-    "Bond Funds": 0.5,
-    "Stock Funds": 0.3,
-    "Money Market": 0.2
-  }},
-  "reasoning": [
-    "Step 1: Based on XX analysis...",
-    "Step 2: Considering XX factors...",
-    "Step 3: Overall recommendation..."
-  ]
-}}
-
-Requirements:
-- allocation must sum to 1.0
-- each asset ratio between 0-1
-- reasoning must show causality
 """
         else:
-            prompt = f"""你是专业的财务顾问，需要综合评估用户的风险承受能力。
-
-风险测评问卷回答:
-{json.dumps(responses, ensure_ascii=False, indent=2)}
+            system_prompt = _RISK_SYSTEM_ZH
+            prompt = f"""风险测评问卷回答:
+{responses_json}
 问卷总分: {score}
 
 用户真实财务画像:
 - 月均消费: ¥{monthly_avg:.2f}
 - 消费波动率: {volatility:.2%}（越高说明收入/支出越不稳定）
 - 可投资金额: ¥{investable:.2f}/月
-
-综合评估规则:
-1. 不要只看问卷分数，消费数据更重要
-2. 如果消费波动率>30%，实际风险承受能力低于问卷显示（收入不稳定）
-3. 如果可投资金额<500元/月，不适合激进策略
-4. 如果月均消费<3000元，可能是学生/低收入群体，需谨慎
-
-请分析并返回JSON:
-{{
-  "risk_profile": "conservative/balanced/aggressive",
-  "allocation": {{
-    "债券基金": 0.5,
-    "股票基金": 0.3,
-    "货币基金": 0.2
-  }},
-  "reasoning": [
-    "分析步骤1: 基于XX判断...",
-    "分析步骤2: 考虑到XX因素...",
-    "分析步骤3: 综合建议..."
-  ]
-}}
-
-要求:
-- allocation总和必须等于1.0
-- 每个资产类别占比0-1之间
-- reasoning必须体现因果关系
 """
 
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                temperature=0.0,  # 风险评估需要稳定输出
-                messages=[
-                    {
-                        "role": "system",
-                        "content": (
-                            "You are a professional risk assessment advisor with comprehensive financial analysis."
-                            if locale == "en_US"
-                            else "你是专业的风险评估顾问，综合分析用户财务状况。"
-                        ),
-                    },
+            content = self._chat_content(
+                client,
+                [
+                    {"role": "system", "content": system_prompt},
                     {"role": "user", "content": prompt},
                 ],
+                temperature=0.0,  # 风险评估需要稳定输出
+                **_JSON_MODE_KWARGS,
             )
-
-            content = response.choices[0].message.content
             if not content:
                 return None
 
@@ -304,7 +594,7 @@ Requirements:
         if not normalized:
             return "未指定", None, None
 
-        amount_match = re.search(r"(\d+(?:\.\d+)?)\s*(万|千|元|块)?", normalized)
+        amount_match = _GOAL_AMOUNT_RE.search(normalized)
         amount_value = None
         if amount_match:
             value = float(amount_match.group(1))
@@ -316,7 +606,7 @@ Requirements:
                 multiplier = 1_000.0
             amount_value = value * multiplier
 
-        horizon_match = re.search(r"(\d+)\s*(年|个月|月)", normalized)
+        horizon_match = _GOAL_HORIZON_RE.search(normalized)
         horizon_months = None
         if horizon_match:
             value = int(horizon_match.group(1))
@@ -334,53 +624,65 @@ Requirements:
     def _transactions_dataframe(
         self, transactions: Iterable[Transaction]
     ) -> pd.DataFrame:
-        rows = [
+        txn_list = list(transactions)
+        if not txn_list:
+            return pd.DataFrame(columns=["date", "amount", "category"])
+        # 按列收集后一次性转换日期，避免逐行调用pd.to_datetime
+        df = pd.DataFrame(
             {
-                "date": pd.to_datetime(txn.date),
-                "amount": float(txn.amount),
-                "category": txn.category or "其他",
+                "date": pd.to_datetime([txn.date for txn in txn_list], cache=True),
+                "amount": [float(txn.amount) for txn in txn_list],
+                "category": pd.Categorical(
+                    [txn.category or "其他" for txn in txn_list]
+                ),
             }
-            for txn in transactions
-        ]
-        if not rows:
-            return pd.DataFrame(columns=["date", "amount", "category"])
-        df = pd.DataFrame(rows)
-        df.sort_values("date", inplace=True)
+        )
+        df.sort_values("date", kind="mergesort", inplace=True)
         return df
 
     @staticmethod
-    def _monthly_average(df: pd.DataFrame) -> float:
-        if df.empty:
-            return 0.0
-        monthly = df.copy()
-        monthly["year_month"] = monthly["date"].dt.to_period("M")
-        grouped = monthly.groupby("year_month")["amount"].sum()
-        return float(grouped.mean()) if not grouped.empty else 0.0
+    def _monthly_stats(
+        year_month: np.ndarray, amounts: np.ndarray
+    ) -> Tuple[float, float]:
+        """Return (monthly average, volatility) from datetime64[M] keys and amounts."""
+        if year_month.size == 0:
+            return 0.0, 0.0
+        # 用numpy按月求和（np.unique + bincount），不经过pandas groupby
+        _, month_index = np.unique(year_month, return_inverse=True)
+        monthly = np.bincount(month_index, weights=amounts)
+        mean = float(monthly.mean())
+        if monthly.size < 2 or mean == 0:
+            return mean, 0.0
+        return mean, float(monthly.std() / mean)
 
     @staticmethod
-    def _spending_volatility(df: pd.DataFrame) -> float:
+    def _category_totals(df: pd.DataFrame) -> Dict[str, float]:
+        """Spend per category, largest first."""
         if df.empty:
-            return 0.0
-        monthly = df.copy()
-        monthly["year_month"] = monthly["date"].dt.to_period("M")
-        grouped = monthly.groupby("year_month")["amount"].sum()
-        if len(grouped) < 2:
-            return 0.0
-        mean = grouped.mean()
-        if mean == 0:
-            return 0.0
-        return float(grouped.std(ddof=0) / mean)
+            return {}
+        totals = df.groupby("category", observed=True)["amount"].sum()
+        return {
+            str(cat): float(value)
+            for cat, value in totals.sort_values(ascending=False, kind="mergesort").items()
+        }
 
     @staticmethod
-    def _category_breakdown(df: pd.DataFrame) -> Dict[str, float]:
-        if df.empty:
-            return {}
-        totals = df.groupby("category")["amount"].sum()
-        full = totals.sum()
+    def _category_totals_small(transactions: List[Transaction]) -> Dict[str, float]:
+        """Pure-Python _category_totals for small inputs (same ordering)."""
+        totals: Dict[str, float] = {}
+        for txn in transactions:
+            cat = txn.category or "其他"
+            totals[cat] = totals.get(cat, 0.0) + float(txn.amount)
+        # 与pandas路径一致：金额降序，金额相同时按分类名排序
+        return dict(sorted(totals.items(), key=lambda item: (-item[1], item[0])))
+
+    @staticmethod
+    def _category_breakdown(totals: Dict[str, float]) -> Dict[str, float]:
+        full = sum(totals.values())
         if full == 0:
             return {}
-        shares = {cat: float(value / full) for cat, value in totals.items()}
-        return dict(sorted(shares.items(), key=lambda item: item[1], reverse=True))
+        # totals已按金额降序排列，占比顺序与之一致
+        return {cat: value / full for cat, value in totals.items()}
 
     @staticmethod
     def _estimate_investable(monthly_avg: float) -> float:
@@ -410,16 +712,34 @@ Requirements:
     def analyze_transactions(
         self, transactions: Iterable[Transaction]
     ) -> Dict[str, float | Dict[str, float]]:
-        df = self._transactions_dataframe(transactions)
-        monthly_avg = self._monthly_average(df)
-        volatility = self._spending_volatility(df)
-        breakdown = self._category_breakdown(df)
+        txn_list = list(transactions)
+        if len(txn_list) < SMALL_ANALYSIS_THRESHOLD:
+            # 少量交易时直接用numpy数组计算，省去构建DataFrame的固定开销
+            amounts = np.fromiter(
+                (float(txn.amount) for txn in txn_list),
+                dtype=np.float64,
+                count=len(txn_list),
+            )
+            year_month = np.array(
+                [txn.date for txn in txn_list], dtype="datetime64[D]"
+            ).astype("datetime64[M]")
+            category_totals = self._category_totals_small(txn_list)
+        else:
+            df = self._transactions_dataframe(txn_list)
+            amounts = df["amount"].to_numpy(np.float64)
+            year_month = df["date"].to_numpy().astype("datetime64[M]")
+            category_totals = self._category_totals(df)
+        monthly_avg, volatility = self._monthly_stats(year_month, amounts)
+        breakdown = self._category_breakdown(category_totals)
         investable = self._estimate_investable(monthly_avg)
         return {
             "monthly_average": monthly_avg,
             "spending_volatility": volatility,
             "category_breakdown": breakdown,
             "investable_amount": investable,
+            # 供详细报告等下游直接读取，避免再次遍历交易
+            "category_totals": category_totals,
+            "total_spending": float(sum(category_totals.values())),
         }
 
     def _generate_llm_recommendations(
@@ -500,20 +820,19 @@ Requirements:
 """
 
         try:
-            response = client.chat.completions.create(
-                model=self.model,
-                temperature=0.3,  # 稍高温度允许创造性，但保持合理性
-                messages=[
+            content = self._chat_content(
+                client,
+                [
                     {"role": "system", "content": system_prompt},
                     {
                         "role": "user",
                         "content": "请基于我的财务数据，生成个性化理财建议。",
                     },
                 ],
+                temperature=0.3,  # 稍高温度允许创造性，但保持合理性
                 timeout=30,
+                **_JSON_MODE_KWARGS,
             )
-
-            content = response.choices[0].message.content
             if not content:
                 logger.warning("LLM返回空内容")
                 return None
@@ -571,7 +890,7 @@ Requirements:
         investable = float(metrics.get("investable_amount", 0.0) or 0.0)
         breakdown = metrics.get("category_breakdown", {}) or {}
 
-        i18n = I18n(locale)
+        i18n = I18n.for_locale(locale)
         allocation = self.generate_allocation(risk_profile)
         allocation_desc, _ = self._format_allocation_desc(allocation, i18n)
 
@@ -653,10 +972,11 @@ Requirements:
     ) -> Tuple[List[Recommendation], Dict[str, float | Dict[str, float]], str]:
         """High-level orchestrator returning recommendations and derived metrics."""
 
+        transactions = list(transactions)
         metrics = self.analyze_transactions(transactions)
         # 将metrics作为user_profile传递给LLM风险评估
         risk_key = self.conduct_risk_assessment(responses, user_profile=metrics)
-        risk_name = I18n(locale).t(f"recommendation.risk_name.{risk_key}")
+        risk_name = I18n.for_locale(locale).t(f"recommendation.risk_name.{risk_key}")
         recs = self.generate_recommendations(
             transactions,
             risk_profile=risk_key,
@@ -689,7 +1009,6 @@ Requirements:
             "locale": locale,
         }
 
-    @safe_call(timeout=30, fallback=None, error_message="个性化问题生成失败")
     def generate_personalized_questions(
         self,
         transactions: Iterable[Transaction],
@@ -707,12 +1026,34 @@ Requirements:
         Returns:
             问题列表，格式兼容原RISK_QUESTIONS，失败返回None
         """
+        bundle = self.generate_questions_with_guidance(
+            transactions=transactions, budget=budget, locale=locale
+        )
+        return bundle["questions"] if bundle else None
+
+    @safe_call(timeout=30, fallback=None, error_message="个性化问题生成失败")
+    def generate_questions_with_guidance(
+        self,
+        transactions: Iterable[Transaction],
+        budget: float,
+        locale: str = "zh_CN",
+    ) -> Dict[str, object] | None:
+        """
+        一次LLM请求同时生成个性化问题与两段引导文案
+
+        Returns:
+            {"questions": [...], "risk_guidance": str, "goal_guidance": str}，
+            问题生成失败返回None；引导文案缺失时对应字段为空字符串
+        """
         try:
             client = self._ensure_client()
         except RuntimeError as e:
             logger.warning(f"LLM client初始化失败: {e}")
             return None
 
+        # 只遍历一次，兼容一次性迭代器
+        transactions = list(transactions)
+
         # 分析用户消费数据
         metrics = self.analyze_transactions(transactions)
         monthly_avg = float(metrics.get("monthly_average", 0.0) or 0.0)
@@ -727,107 +1068,44 @@ Requirements:
         top_category = next(iter(breakdown.keys())) if breakdown else "其他"
         top_category_share = next(iter(breakdown.values())) if breakdown else 0
 
-        txn_list = list(transactions)
-        total_amount = sum(t.amount for t in txn_list)
-
+        # 规则与输出格式放在固定的system前缀中，user消息只含本次用户数据
         if locale == "en_US":
-            system_prompt = """You are a professional financial advisor. Generate 3-5 personalized risk assessment questions based on user's real spending data."""
-
-            user_prompt = f"""Generate 3-5 personalized risk tolerance questions based on user's financial data:
-
-User Financial Profile:
+            system_prompt = _QUESTIONS_SYSTEM_EN
+            user_prompt = f"""User Financial Profile:
 - Monthly spending: ¥{monthly_avg:,.2f}
 - Monthly budget: ¥{budget:,.2f}
 - Budget usage: {budget_usage_rate:.1f}%
 - Spending volatility: {volatility:.2%}
 - Investable amount: ¥{investable:,.2f}/month
 - Top spending category: {top_category} ({top_category_share*100:.1f}%)
-- Total transactions: {len(txn_list)} records
-
-Question Generation Rules:
-1. If volatility > 30%: Ask about income stability
-2. If investable < 500: Ask about emergency fund
-3. If budget_usage > 80%: Ask about debt situation
-4. If top_category_share > 40%: Ask about category-specific plans
-5. Always include: loss tolerance, investment horizon, volatility attitude
-
-Return JSON format:
-{{
-  "questions": [
-    {{
-      "id": "custom_q1",
-      "question": "Your question here",
-      "options": [
-        {{"label": "Option 1", "score": 1}},
-        {{"label": "Option 2", "score": 2}},
-        {{"label": "Option 3", "score": 3}}
-      ]
-    }}
-  ]
-}}
-
-Requirements:
-- 3-5 questions total
-- Each question must have 3 options with scores 1-3
-- Questions must be specific to user's situation
-- Natural, conversational tone
+- Total transactions: {len(transactions)} records
 """
         else:  # zh_CN
-            system_prompt = """你是专业的理财顾问，基于用户的真实消费数据生成个性化风险评估问题。"""
-
-            user_prompt = f"""基于用户的真实财务数据，生成3-5个个性化的风险承受能力评估问题：
-
-用户财务画像：
+            system_prompt = _QUESTIONS_SYSTEM_ZH
+            user_prompt = f"""用户财务画像：
 - 月均消费：¥{monthly_avg:,.2f}
 - 月度预算：¥{budget:,.2f}
 - 预算使用率：{budget_usage_rate:.1f}%
 - 消费波动率：{volatility:.2%}
 - 可投资金额：¥{investable:,.2f}/月
 - 最大支出类目：{top_category}（占比{top_category_share*100:.1f}%）
-- 交易记录：{len(txn_list)}笔
-
-问题生成规则：
-1. 如果消费波动率>30%：询问收入稳定性
-2. 如果可投资金额<500元：询问是否有紧急备用金
-3. 如果预算使用率>80%：询问债务情况
-4. 如果某类目占比>40%：询问该类目的特殊计划
-5. 必须包含：亏损承受能力、投资期限、波动态度
-
-返回JSON格式：
-{{
-  "questions": [
-    {{
-      "id": "custom_q1",
-      "question": "您的问题",
-      "options": [
-        {{"label": "选项1", "score": 1}},
-        {{"label": "选项2", "score": 2}},
-        {{"label": "选项3", "score": 3}}
-      ]
-    }}
-  ]
-}}
-
-要求：
-- 总共3-5个问题
-- 每个问题必须有3个选项，分数1-3
-- 问题必须贴合用户实际情况
-- 语言自然、口语化
+- 交易记录：{len(transactions)}笔
 """
 
         try:
             logger.info("开始生成个性化风险问题")
-            response = client.chat.completions.create(
-                model=self.model,
-                temperature=0.7,
-                messages=[
+            content = self._chat_content(
+                client,
+                [
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt},
                 ],
+                temperature=0.7,
+                # 问卷在每次点击时重跑，缓存保证同一份数据看到的问题不变
+                cache=True,
                 timeout=30,
+                **_JSON_MODE_KWARGS,
             )
-
-            content = response.choices[0].message.content
             if not content:
                 logger.warning("LLM返回空内容")
                 return None
@@ -852,7 +1130,11 @@ Requirements:
                     return None
 
             logger.info(f"成功生成{len(questions)}个个性化问题")
-            return questions
+            return {
+                "questions": questions,
+                "risk_guidance": str(data.get("risk_guidance") or "").strip(),
+                "goal_guidance": str(data.get("goal_guidance") or "").strip(),
+            }
 
         except json.JSONDecodeError as e:
             logger.warning(f"JSON解析失败: {e}")
@@ -861,8 +1143,7 @@ Requirements:
             logger.error(f"个性化问题生成失败: {e}")
             return None
 
-    @safe_call(timeout=60, fallback="", error_message="详细报告生成失败")
-    def generate_detailed_report(
+    def generate_detailed_report_stream(
         self,
         transactions: Iterable[Transaction],
         responses: Dict[str, int],
@@ -870,9 +1151,12 @@ Requirements:
         risk_profile: str,
         metrics: Dict[str, float | Dict[str, float]],
         locale: str = "zh_CN",
-    ) -> str:
+    ) -> Iterator[str]:
         """
-        生成详细的理财报告（Markdown格式，使用GPT-4o完整模型）
+        流式生成详细理财报告（Markdown格式，使用report_model），逐段yield文本
+
+        供st.write_stream使用：首段内容很快到达，避免长请求被网关超时；
+        失败时记录日志并提前结束，调用方根据拼接结果是否为空判断成败
 
         Args:
             transactions: 交易记录
@@ -881,16 +1165,43 @@ Requirements:
             risk_profile: 风险等级（conservative/balanced/aggressive）
             metrics: 财务画像指标
             locale: 语言区域
-
-        Returns:
-            Markdown格式的详细理财报告
         """
         try:
             client = self._ensure_client()
         except RuntimeError as e:
             logger.warning(f"LLM client初始化失败: {e}")
-            return ""
+            return
 
+        messages = self._build_detailed_report_messages(
+            transactions, investment_goal, risk_profile, metrics, locale
+        )
+
+        try:
+            logger.info(f"开始流式生成详细报告，使用模型: {self.report_model}")
+            _LLM_RATE_LIMITER.acquire()
+            completion_stream = client.with_options(max_retries=0).chat.completions.create(
+                model=self.report_model,
+                temperature=0.7,
+                max_tokens=REPORT_MAX_TOKENS,
+                messages=messages,
+                stream=True,
+                timeout=90,  # 流式模式下为单次读取的等待上限
+            )
+            for chunk in completion_stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"详细报告流式生成失败: {e}")
+
+    def _build_detailed_report_messages(
+        self,
+        transactions: Iterable[Transaction],
+        investment_goal: str,
+        risk_profile: str,
+        metrics: Dict[str, float | Dict[str, float]],
+        locale: str,
+    ) -> List[Dict[str, str]]:
+        """构建详细报告的system/user消息"""
         # 准备数据
         monthly_avg = float(metrics.get("monthly_average", 0.0) or 0.0)
         volatility = float(metrics.get("spending_volatility", 0.0) or 0.0)
@@ -898,18 +1209,17 @@ Requirements:
         breakdown = metrics.get("category_breakdown", {}) or {}
         allocation = self.generate_allocation(risk_profile)
 
-        # 交易数据统计
+        # 交易数据统计（优先复用analyze_transactions已算好的分类合计）
         txn_list = list(transactions)
-        total_amount = sum(t.amount for t in txn_list)
-        categories = {}
-        for txn in txn_list:
-            cat = txn.category or "其他"
-            categories[cat] = categories.get(cat, 0) + txn.amount
+        categories = metrics.get("category_totals")
+        if categories is None:
+            categories = self._category_totals(self._transactions_dataframe(txn_list))
+        total_amount = float(metrics.get("total_spending") or sum(categories.values()))
 
-        # 消费类别详情
+        # 消费类别详情（category_totals已按金额降序）
         category_details = "\n".join(
             f"  - **{cat}**: ¥{amount:,.2f} ({amount/total_amount*100:.1f}%)"
-            for cat, amount in sorted(categories.items(), key=lambda x: x[1], reverse=True)
+            for cat, amount in categories.items()
         )
 
         # 完整交易明细（供LLM深入分析）
@@ -1113,27 +1423,7 @@ Format Requirements:
 - 避免空洞的通用建议，所有建议必须有具体数字和时间表
 - 报告总字数应在4000-6000字之间"""
 
-        try:
-            logger.info(f"开始生成详细报告，使用模型: {self.report_model}")
-            response = client.chat.completions.create(
-                model=self.report_model,
-                temperature=0.7,  # 稍高温度允许更自然的写作风格
-                max_tokens=12000,  # 支持4000-6000字的详细报告
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
-                timeout=90,  # 长文本生成需要更多时间
-            )
-
-            content = response.choices[0].message.content
-            if not content:
-                logger.warning("LLM返回空内容")
-                return ""
-
-            logger.info(f"详细报告生成成功，长度: {len(content)} 字符")
-            return content.strip()
-
-        except Exception as e:
-            logger.error(f"详细报告生成失败: {e}")
-            return ""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
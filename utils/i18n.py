@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
 
 class I18n:
@@ -15,6 +15,12 @@ class I18n:
         self.locale = locale
         self.translations = self._load_translations(locale)
 
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def for_locale(locale: str) -> "I18n":
+        """Return the shared instance for a locale (read-only; never switch_locale it)."""
+        return I18n(locale)
+
     @staticmethod
     @lru_cache(maxsize=8)
     def _read_locale_file(locale: str) -> Dict[str, Any]:
@@ -25,24 +31,35 @@ class I18n:
                 return json.load(file)
         return {}
 
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _resolve(locale: str, key: str) -> Tuple[str, bool]:
+        """Resolve a dotted key once per locale; returns (text, is_template)."""
+        value: Any = I18n._read_locale_file(locale)
+        for segment in key.split("."):
+            if isinstance(value, dict) and segment in value:
+                value = value[segment]
+            else:
+                return key, True
+
+        if isinstance(value, str):
+            return value, True
+        return str(value), False
+
     def _load_translations(self, locale: str) -> Dict[str, Any]:
         """Load translation file for given locale."""
         return self._read_locale_file(locale)
 
     def t(self, key: str, **kwargs: Any) -> str:
         """Translate key with optional formatting."""
-        segments = key.split(".")
-        value: Any = self.translations
-        for segment in segments:
-            if isinstance(value, dict) and segment in value:
-                value = value[segment]
-            else:
-                value = key
-                break
+        text, is_template = self._resolve(self.locale, key)
+        if kwargs and is_template:
+            return text.format(**kwargs)
+        return text
 
-        if isinstance(value, str):
-            return value.format(**kwargs) if kwargs else value
-        return str(value)
+    def template(self, key: str) -> str:
+        """Return the unformatted string for key, for hoisting out of loops."""
+        return self._resolve(self.locale, key)[0]
 
     def switch_locale(self, locale: str) -> None:
         """Switch to different locale."""
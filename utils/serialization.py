@@ -0,0 +1,33 @@
+"""JSON encode/decode helpers with an optional orjson fast path."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:  # pragma: no cover - 外部依赖按需安装
+    import orjson
+except ImportError:  # pragma: no cover - 回退到标准库json
+    orjson = None
+
+
+def dumps_bytes(data: Any, *, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON bytes (non-ASCII kept as-is)."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, option=option)
+    return json.dumps(
+        data, ensure_ascii=False, indent=2 if indent else None
+    ).encode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON text or bytes; raises json.JSONDecodeError on bad input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+__all__ = ["dumps_bytes", "loads"]
@@ -5,14 +5,23 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
+from collections import OrderedDict
 from copy import deepcopy
 from datetime import date
-from typing import Any, Dict, Iterable, List
+from typing import Any, Dict, Iterable, List, Sequence
 
 import streamlit as st
+from pydantic import TypeAdapter
 
-from models.entities import Transaction
+try:  # pragma: no cover - 内部API，随Streamlit版本变化
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+except ImportError:  # pragma: no cover
+    get_script_run_ctx = None
+
+from models.entities import SpendingInsight, Transaction
+from modules.analysis import generate_insights
 from utils.i18n import I18n
+from utils.serialization import dumps_bytes
 from utils.storage import save_to_storage
 
 logger = logging.getLogger(__name__)
@@ -31,14 +40,23 @@ DEFAULT_STATE: Dict[str, Any] = {
     "trusted_merchants": [],
     "anomaly_message": "",
     "locale": "zh_CN",
-    "chat_cache": {},
+    "chat_cache": OrderedDict(),
     "chat_cache_version": 0,
+    "transactions_version": 0,
     "monthly_budget": 5000.0,
     "data_restored": False,
     "selected_page": "home",  # 确保默认从首页开始
 }
 
 
+# 已从存储恢复过数据的会话ID。必须放在被导入的模块中：app.py作为主脚本
+# 每次重跑都在新的命名空间执行，模块级集合无法跨重跑保留
+_RESTORED_SESSIONS: set[str] = set()
+
+# 批量序列化交易列表（pydantic-core一次完成，避免逐条model_dump）
+_TRANSACTION_LIST_ADAPTER = TypeAdapter(List[Transaction])
+
+
 def init_session_state() -> None:
     """Ensure every expected key exists in `st.session_state`."""
     for key, default_value in DEFAULT_STATE.items():
@@ -46,12 +64,48 @@ def init_session_state() -> None:
             if isinstance(default_value, list):
                 st.session_state[key] = list(default_value)
             elif isinstance(default_value, dict):
-                st.session_state[key] = dict(default_value)
+                st.session_state[key] = type(default_value)(default_value)
             else:
                 st.session_state[key] = default_value
 
     if "i18n" not in st.session_state:
-        st.session_state["i18n"] = I18n(st.session_state.get("locale", "zh_CN"))
+        st.session_state["i18n"] = I18n.for_locale(
+            st.session_state.get("locale", "zh_CN")
+        )
+
+
+def _current_session_id() -> str | None:
+    """Return the Streamlit session id of the running script, if available."""
+    if get_script_run_ctx is None:
+        return None
+    ctx = get_script_run_ctx()
+    return getattr(ctx, "session_id", None) if ctx else None
+
+
+def needs_storage_restore() -> bool:
+    """Return True until the current session has been hydrated from storage."""
+    session_id = _current_session_id()
+    if session_id is not None and session_id in _RESTORED_SESSIONS:
+        return False
+    return not st.session_state.get("data_restored", False)
+
+
+def mark_storage_restored(restored: bool = True) -> None:
+    """Record (or, with ``restored=False``, forget) the storage restore for this session."""
+    st.session_state["data_restored"] = restored
+    session_id = _current_session_id()
+    if session_id is None:
+        return
+    if restored:
+        _RESTORED_SESSIONS.add(session_id)
+    else:
+        _RESTORED_SESSIONS.discard(session_id)
+
+
+def snapshot_state(*keys: str) -> Dict[str, Any]:
+    """Read several session keys in one pass (missing keys map to None)."""
+    state = st.session_state
+    return {key: state.get(key) for key in keys}
 
 
 def reset_session_state(keys: List[str] | None = None) -> None:
@@ -79,6 +133,14 @@ def _serialize_transaction_entry(entry: Transaction | dict) -> Dict[str, Any]:
     return data
 
 
+def _serialize_transactions(entries: Iterable[Transaction | dict]) -> List[Dict[str, Any]]:
+    """Serialise a batch of transactions; all-model lists dump in one pydantic-core call."""
+    entries = list(entries)
+    if all(isinstance(entry, Transaction) for entry in entries):
+        return _TRANSACTION_LIST_ADAPTER.dump_python(entries, mode="json")
+    return [_serialize_transaction_entry(entry) for entry in entries]
+
+
 def _persist_state(key: str, value: Any) -> None:
     """Persist a session value to storage while swallowing I/O errors."""
     try:
@@ -91,10 +153,10 @@ def _invalidate_chat_cache() -> None:
     """重置聊天缓存并增加版本号，确保依赖数据变化后不会读旧值。"""
 
     cache = st.session_state.get("chat_cache")
-    if isinstance(cache, dict):
+    if isinstance(cache, OrderedDict):
         cache.clear()
     else:
-        st.session_state["chat_cache"] = {}
+        st.session_state["chat_cache"] = OrderedDict()
     st.session_state["chat_cache_version"] = (
         st.session_state.get("chat_cache_version", 0) + 1
     )
@@ -110,12 +172,74 @@ def get_transactions() -> List[Transaction]:
 
 def set_transactions(transactions: Iterable[Transaction | dict]) -> None:
     """Persist a new transaction list into session state."""
-    serialized = [_serialize_transaction_entry(txn) for txn in transactions]
+    serialized = _serialize_transactions(transactions)
     st.session_state["transactions"] = serialized
+    st.session_state["transactions_version"] = get_transactions_version() + 1
     _persist_state("transactions", serialized)
     _invalidate_chat_cache()
 
 
+def extend_transactions(transactions: Iterable[Transaction | dict]) -> int:
+    """Append new transactions in place, skipping IDs already stored.
+
+    Returns the number of entries actually added.
+    """
+    stored = st.session_state.get("transactions")
+    if not isinstance(stored, list):
+        stored = list(stored or [])
+    seen_ids = {entry.get("id") for entry in stored if isinstance(entry, dict)}
+    added = 0
+    for data in _serialize_transactions(transactions):
+        txn_id = data.get("id")
+        if txn_id and txn_id in seen_ids:
+            continue
+        seen_ids.add(txn_id)
+        stored.append(data)
+        added += 1
+    if not added:
+        return 0
+    st.session_state["transactions"] = stored
+    st.session_state["transactions_version"] = get_transactions_version() + 1
+    _persist_state("transactions", stored)
+    _invalidate_chat_cache()
+    return added
+
+
+def get_transactions_count() -> int:
+    """Return the number of stored transactions without building models."""
+    return len(st.session_state.get("transactions") or [])
+
+
+def get_transactions_version() -> int:
+    """Return a counter bumped whenever `set_transactions` or `extend_transactions` changes the list."""
+    return int(st.session_state.get("transactions_version", 0))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _cached_insights(
+    content_digest: str,
+    locale: str,
+    _transactions: Sequence[Transaction],
+) -> List[SpendingInsight]:
+    """Memoise generate_insights on transaction content (``_`` arg not hashed)."""
+    return generate_insights(_transactions, locale=locale)
+
+
+def get_insights_cached(
+    transactions: Sequence[Transaction], locale: str = "zh_CN"
+) -> List[SpendingInsight]:
+    """Return insights for the given transactions, reusing results across reruns."""
+    # 先压缩成短摘要，避免Streamlit对整张交易表做参数哈希
+    content = dumps_bytes(
+        [
+            (txn.id, str(txn.date), txn.merchant, txn.category, txn.amount)
+            for txn in transactions
+        ]
+    )
+    content_digest = hashlib.blake2b(content, digest_size=16).hexdigest()
+    return _cached_insights(content_digest, locale, transactions)
+
+
 def get_trusted_merchants() -> List[str]:
     """Return the merchant whitelist."""
     merchants = st.session_state.get("trusted_merchants", [])
@@ -226,8 +350,8 @@ def get_i18n() -> I18n:
     if isinstance(i18n, I18n):
         return i18n
 
-    # 创建新实例
-    i18n = I18n(st.session_state.get("locale", "zh_CN"))
+    # 复用共享实例
+    i18n = I18n.for_locale(st.session_state.get("locale", "zh_CN"))
     st.session_state["i18n"] = i18n
     return i18n
 
@@ -235,8 +359,8 @@ def get_i18n() -> I18n:
 def switch_locale(locale: str) -> None:
     """Switch application locale and refresh I18n instance."""
     st.session_state["locale"] = locale
-    i18n = get_i18n()
-    i18n.switch_locale(locale)
+    # 替换而非修改实例：共享实例被多个会话引用
+    st.session_state["i18n"] = I18n.for_locale(locale)
 
 
 def get_monthly_budget() -> float:
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import os
+import shutil
+import time
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Mapping, Optional
+
+from utils.serialization import dumps_bytes, loads
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +42,10 @@ def _resolve_storage_file() -> Path:
 
 
 STORAGE_FILE = _resolve_storage_file()
+# 详细报告缓存目录（每份报告一个JSON文件），与持久化数据一起清除
+REPORT_CACHE_DIRNAME = "report_cache"
+REPORT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+REPORT_CACHE_MAX_ENTRIES = 200
 
 
 class StorageBackend:
@@ -50,6 +57,10 @@ class StorageBackend:
     def load(self, key: str, default: Any = None) -> Optional[Any]:  # pragma: no cover
         raise NotImplementedError
 
+    def load_many(self, defaults: Mapping[str, Any]) -> Dict[str, Any]:
+        """Load several keys at once; backends may override to batch I/O."""
+        return {key: self.load(key, default) for key, default in defaults.items()}
+
     def clear(self) -> bool:  # pragma: no cover - interface
         raise NotImplementedError
 
@@ -60,14 +71,15 @@ class FileStorageBackend(StorageBackend):
     def __init__(self, storage_file: Path = STORAGE_FILE):
         self.storage_file = storage_file
         self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+        self.report_cache_dir = storage_file.parent / REPORT_CACHE_DIRNAME
 
     def _load_all(self) -> Dict[str, Any]:
         """Load the entire storage payload."""
         if not self.storage_file.exists():
             return {}
         try:
-            with self.storage_file.open("r", encoding="utf-8") as handle:
-                return json.load(handle)
+            raw = self.storage_file.read_bytes()
+            return loads(raw) if raw else {}
         except Exception as exc:  # pragma: no cover - defensive
             logger.warning("Failed to load storage file: %s", exc)
             return {}
@@ -75,8 +87,7 @@ class FileStorageBackend(StorageBackend):
     def _save_all(self, data: Dict[str, Any]) -> bool:
         """Persist the entire payload atomically."""
         try:
-            with self.storage_file.open("w", encoding="utf-8") as handle:
-                json.dump(data, handle, ensure_ascii=False, indent=2)
+            self.storage_file.write_bytes(dumps_bytes(data, indent=True))
             return True
         except Exception as exc:  # pragma: no cover - defensive
             logger.error("Failed to save storage file: %s", exc)
@@ -93,11 +104,46 @@ class FileStorageBackend(StorageBackend):
         data = self._load_all()
         return data.get(f"{STORAGE_PREFIX}{key}", default)
 
+    def load_many(self, defaults: Mapping[str, Any]) -> Dict[str, Any]:
+        """Load several keys with a single file read."""
+        data = self._load_all()
+        return {
+            key: data.get(f"{STORAGE_PREFIX}{key}", default)
+            for key, default in defaults.items()
+        }
+
+    def load_report(self, cache_key: str) -> Optional[str]:
+        """Return a cached report, or None when missing or expired."""
+        path = self.report_cache_dir / f"{cache_key}.json"
+        try:
+            entry = loads(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        if time.time() - float(entry.get("created_at", 0)) > REPORT_CACHE_TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            return None
+        return entry.get("report") or None
+
+    def save_report(self, cache_key: str, report: str) -> bool:
+        """Store a report and drop the oldest files beyond REPORT_CACHE_MAX_ENTRIES."""
+        self.report_cache_dir.mkdir(parents=True, exist_ok=True)
+        (self.report_cache_dir / f"{cache_key}.json").write_bytes(
+            dumps_bytes({"created_at": time.time(), "report": report})
+        )
+        cached = sorted(
+            self.report_cache_dir.glob("*.json"), key=lambda item: item.stat().st_mtime
+        )
+        for stale in cached[: max(0, len(cached) - REPORT_CACHE_MAX_ENTRIES)]:
+            stale.unlink(missing_ok=True)
+        return True
+
     def clear(self) -> bool:
-        """Delete the storage file."""
+        """Delete the storage file and cached reports."""
         try:
             if self.storage_file.exists():
                 self.storage_file.unlink()
+            if self.report_cache_dir.exists():
+                shutil.rmtree(self.report_cache_dir)
             return True
         except Exception as exc:  # pragma: no cover - defensive
             logger.error("Failed to clear storage: %s", exc)
@@ -137,6 +183,58 @@ def load_from_storage(key: str, default: Any = None) -> Optional[Any]:
         return default
 
 
+def load_many_from_storage(defaults: Mapping[str, Any]) -> Dict[str, Any]:
+    """
+    Load several values from persistent storage in one pass.
+
+    Args:
+        defaults: Mapping of logical key to the value used when it is missing.
+    """
+    try:
+        return _storage.load_many(defaults)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.warning("Failed to load %s from storage: %s", list(defaults), exc)
+        return dict(defaults)
+
+
+def load_cached_report(cache_key: str) -> Optional[str]:
+    """
+    Load a cached detailed report.
+
+    Args:
+        cache_key: Digest of the report inputs.
+    """
+    try:
+        return _storage.load_report(cache_key)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.warning("Failed to load cached report %s: %s", cache_key, exc)
+        return None
+
+
+def save_cached_report(cache_key: str, report: str) -> bool:
+    """
+    Cache a detailed report on disk; cleared together with the other data.
+
+    Args:
+        cache_key: Digest of the report inputs.
+        report: Markdown report text.
+    """
+    try:
+        return _storage.save_report(cache_key, report)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.warning("Failed to cache detailed report: %s", exc)
+        return False
+
+
+def get_storage_version() -> int:
+    """Return a token that changes whenever the storage file is rewritten."""
+    storage_file = getattr(_storage, "storage_file", None)
+    try:
+        return storage_file.stat().st_mtime_ns if storage_file else 0
+    except OSError:
+        return 0
+
+
 def clear_all_storage() -> bool:
     """Clear every persisted item."""
     try:
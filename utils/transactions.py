@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import hashlib
 from datetime import date, datetime
-from typing import Any
+from typing import Any, Iterable, List, Optional
 
 
 def _normalize_date(value: Any) -> str:
@@ -41,4 +41,36 @@ def generate_transaction_id(
     return digest[:16]
 
 
-__all__ = ["generate_transaction_id"]
+def generate_transaction_ids_batch(
+    *,
+    merchants: Iterable[str],
+    dates: Iterable[Any],
+    amounts: Iterable[float],
+    currencies: Iterable[str],
+    source_hash: str | None = None,
+    sequences: Optional[Iterable[int]] = None,
+) -> List[str]:
+    """批量生成交易ID，结果与逐条调用 generate_transaction_id 完全一致。"""
+
+    merchant_keys = [(merchant or "").strip().lower() for merchant in merchants]
+    date_keys = [_normalize_date(value) for value in dates]
+    amount_keys = [f"{float(amount):.2f}" for amount in amounts]
+    currency_keys = [(currency or "CNY").strip().upper() for currency in currencies]
+    suffix = f"|{source_hash}" if source_hash else ""
+    if sequences is None:
+        sequence_keys = [""] * len(merchant_keys)
+    else:
+        sequence_keys = [f"|{sequence}" for sequence in sequences]
+
+    sha256 = hashlib.sha256
+    return [
+        sha256(
+            f"{merchant}|{date_value}|{amount}|{currency}{suffix}{sequence}".encode("utf-8")
+        ).hexdigest()[:16]
+        for merchant, date_value, amount, currency, sequence in zip(
+            merchant_keys, date_keys, amount_keys, currency_keys, sequence_keys
+        )
+    ]
+
+
+__all__ = ["generate_transaction_id", "generate_transaction_ids_batch"]
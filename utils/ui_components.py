@@ -37,6 +37,15 @@ def responsive_width_kwargs(component: Callable[..., Any], stretch: bool = True)
     return {"use_container_width": stretch}
 
 
+def fragment(func: Callable[..., Any]) -> Callable[..., Any]:
+    """以st.fragment包装函数，局部交互只重跑该片段；旧版Streamlit下原样返回"""
+
+    decorator = getattr(st, "fragment", None) or getattr(
+        st, "experimental_fragment", None
+    )
+    return decorator(func) if decorator else func
+
+
 @lru_cache(maxsize=32)
 def _resolve_width_param(component: Callable[..., Any]) -> str | None:
     """缓存组件可用的宽度参数，避免多次反射"""